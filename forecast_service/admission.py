@@ -0,0 +1,112 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Tuple
+
+from starlette.responses import JSONResponse
+
+from metrics import ADMISSION_REJECTED
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of being served"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class EndpointLimiter:
+    """
+    Concurrency limit for one endpoint with a bounded wait queue.
+
+    At most `concurrency` requests are served at once and at most `queue_depth`
+    more wait for a slot. Anything beyond that is rejected at once with 429;
+    a request that waits longer than `queue_timeout` seconds gets 503.
+    """
+
+    def __init__(self, concurrency: int, queue_depth: int, queue_timeout: float):
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Moving average of how long a request holds its slot, for Retry-After
+        self.avg_seconds = 1.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def retry_after(self) -> int:
+        """Seconds until the requests ahead should roughly have drained"""
+        return max(1, min(60, math.ceil(self.avg_seconds * (self.waiting + 1) / self.concurrency)))
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # a slot is free, so this returns without suspending
+        elif self.waiting >= self.queue_depth:
+            raise AdmissionRejected(
+                429, f"{self.active} requests in progress and {self.waiting} queued, please retry later",
+                self.retry_after()
+            )
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise AdmissionRejected(
+                    503, f"No capacity within {self.queue_timeout:g}s, please retry later", self.retry_after()
+                )
+            finally:
+                self.waiting -= 1
+
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.perf_counter() - started)
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[int, int]]:
+    """"/forecast=16:32,/rank-event-dates=4:8" -> {path: (concurrency, queue_depth)}"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        path, _, value = item.strip().partition("=")
+        concurrency, _, queue_depth = value.partition(":")
+        limits[path] = (int(concurrency), int(queue_depth or 0))
+    return limits
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying an EndpointLimiter per request path. Shed requests
+    get a JSON error with Retry-After before the body is read or any work is done;
+    admitted ones hold their slot until the response, streamed or not, is sent.
+    """
+
+    def __init__(self, app, limiters: Dict[str, EndpointLimiter]):
+        self.app = app
+        self.limiters = limiters
+
+    async def __call__(self, scope, receive, send):
+        limiter = self.limiters.get(scope["path"]) if scope["type"] == "http" else None
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with limiter.slot():
+                await self.app(scope, receive, send)
+        except AdmissionRejected as e:
+            ADMISSION_REJECTED.inc(endpoint=scope["path"], status=str(e.status_code))
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers={"Retry-After": str(e.retry_after)}
+            )
+            await response(scope, receive, send)
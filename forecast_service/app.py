@@ -1,14 +1,92 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 import pandas as pd
-import requests
+import asyncio
+import json
+import os
+import secrets
 import sys
+import time
 import numpy as np
 
-app = FastAPI(title="NASA Weather Forecast Service")
+from admission import AdmissionMiddleware, EndpointLimiter, parse_limits
+from climatology_index import INDEX_STATS, ClimatologyIndex, calendar_slot, daily_statistics
+from fit_pool import FitPool, FitPoolBroken, FitPoolSaturated
+from forecast_models import (
+    DEFAULT_ENGINE, MODEL_ENGINES, fit_model_state, get_warmup_status, train_with_timings, update_model_state,
+    warm_up_engines
+)
+from metrics import (
+    ADMISSION_SLOTS, COALESCING_STATS, FIT_POOL_CAPACITY, FIT_POOL_PENDING, FIT_POOL_RESTARTS, FORECAST_CACHE_STATS,
+    MODEL_FITS, MetricsMiddleware, record_stage, render_metrics, stage
+)
+from model_cache import ForecastCache
+from model_state import ModelStateStore
+from prefetch import HotLocations, PrefetchScheduler
+from single_flight import SingleFlight
+from nasa_cache import CACHE_COLUMNS, NASA_FILL_VALUE, NasaPowerCache
+from nasa_client import POWER_PARAMETERS, NasaPowerClient, parse_daily_point
+from nasa_grid import snap_to_grid
+from response_formats import (
+    COLUMNAR_JSON_MEDIA_TYPE, JSON_MEDIA_TYPE, MIN_COMPRESS_BYTES, MSGPACK_MEDIA_TYPE, NDJSON_MEDIA_TYPE,
+    StreamCompressor, compress, etag_matches, http_date, make_etag, negotiate_encoding,
+    negotiate_media_type, pack_msgpack
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources at startup and release them at shutdown"""
+    global nasa_client, fit_pool
+    pooled_warmup = [key for key in WARMUP_MODELS if not MODEL_ENGINES[key].inline]
+    fit_pool = FitPool(
+        workers=FIT_WORKERS,
+        queue_depth=FIT_QUEUE_DEPTH,
+        initializer=warm_up_engines if pooled_warmup else None,
+        initargs=(pooled_warmup,)
+    )
+    nasa_client = NasaPowerClient(
+        max_per_host=NASA_MAX_CONCURRENCY,
+        max_connections=NASA_MAX_CONNECTIONS,
+        timeout=NASA_TIMEOUT,
+        max_retries=NASA_MAX_RETRIES,
+        backoff_base=NASA_RETRY_BACKOFF,
+    )
+    for key in WARMUP_MODELS:
+        engine_status[key] = "warming"
+    warmup_task = asyncio.create_task(warm_up_on_startup()) if WARMUP_MODELS else None
+    if PREFETCH_INTERVAL > 0:
+        prefetch_scheduler.start()
+    try:
+        yield
+    finally:
+        if warmup_task:
+            warmup_task.cancel()
+        prefetch_scheduler.stop()
+        await nasa_client.aclose()
+        nasa_client = None
+        fit_pool.shutdown()
+        fit_pool = None
+
+app = FastAPI(title="NASA Weather Forecast Service", lifespan=lifespan)
+
+# Admission control: "path=concurrency:queue_depth" per endpoint. Requests past the queue get 429 at
+# once, and queued requests that wait longer than ADMISSION_QUEUE_TIMEOUT seconds get 503.
+# Added before CORS so shed responses still carry CORS headers.
+ADMISSION_LIMITS = parse_limits(os.getenv(
+    "ADMISSION_LIMITS",
+    "/forecast=16:32,/thirty-day-forecast=64:128,/thirty-day-forecast/batch=8:16,/rank-event-dates=4:8"
+))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+admission_limiters = {
+    path: EndpointLimiter(concurrency, queue_depth, ADMISSION_QUEUE_TIMEOUT)
+    for path, (concurrency, queue_depth) in ADMISSION_LIMITS.items()
+}
+app.add_middleware(AdmissionMiddleware, limiters=admission_limiters)
 
 # Enable CORS for React frontend
 app.add_middleware(
@@ -19,15 +97,118 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Try to import Prophet, fallback to statsmodels ARIMA
-try:
-    from prophet import Prophet
-    USE_PROPHET = True
-    print("✓ Using Prophet for forecasting")
-except ImportError:
-    print("⚠ Prophet not available, using ARIMA fallback")
-    from statsmodels.tsa.arima.model import ARIMA
-    USE_PROPHET = False
+# Opt-in Server-Timing header with the per-stage breakdown of each request
+SERVER_TIMING = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+def route_label(path: str) -> str:
+    """Metrics label for a request path: the route itself, or "other" so unknown paths can't blow up cardinality"""
+    return path if path in {route.path for route in app.routes} else "other"
+
+app.add_middleware(MetricsMiddleware, route_label=route_label, server_timing=SERVER_TIMING)
+
+# Persistent on-disk cache for NASA POWER history (set NASA_CACHE_DIR="" to disable)
+NASA_CACHE_DIR = os.getenv(
+    "NASA_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "nasa_power")
+)
+# Days NASA returned as not yet published aren't requested again for this many seconds
+NASA_UNPUBLISHED_TTL = float(os.getenv("NASA_UNPUBLISHED_TTL", "10800"))
+nasa_cache = NasaPowerCache(NASA_CACHE_DIR, NASA_UNPUBLISHED_TTL) if NASA_CACHE_DIR else None
+
+# Precomputed day-of-year climatology (built with climatology_index.py), memory-mapped read-only.
+# Indexed locations get thirty-day forecasts without any NASA request.
+CLIMATOLOGY_INDEX_DIR = os.getenv("CLIMATOLOGY_INDEX_DIR", "")
+climatology_index: Optional[ClimatologyIndex] = None
+if CLIMATOLOGY_INDEX_DIR:
+    try:
+        climatology_index = ClimatologyIndex(CLIMATOLOGY_INDEX_DIR)
+        print(f"✓ Loaded climatology index {climatology_index.values.shape[:2]} cells from {CLIMATOLOGY_INDEX_DIR}")
+    except Exception as e:
+        print(f"⚠ Climatology index not loaded ({CLIMATOLOGY_INDEX_DIR}): {e}")
+
+# Shared NASA POWER HTTP client, created in lifespan()
+NASA_POWER_URL = os.getenv("NASA_POWER_URL", "https://power.larc.nasa.gov/api/temporal/daily/point")
+NASA_MAX_CONCURRENCY = int(os.getenv("NASA_MAX_CONCURRENCY", "8"))
+NASA_MAX_CONNECTIONS = int(os.getenv("NASA_MAX_CONNECTIONS", "32"))
+NASA_TIMEOUT = float(os.getenv("NASA_TIMEOUT", "30"))
+NASA_MAX_RETRIES = int(os.getenv("NASA_MAX_RETRIES", "3"))
+NASA_RETRY_BACKOFF = float(os.getenv("NASA_RETRY_BACKOFF", "0.5"))
+nasa_client: Optional[NasaPowerClient] = None
+
+# Long history ranges are fetched as calendar-year chunks, this many at a time per fetch
+NASA_CHUNK_PARALLELISM = int(os.getenv("NASA_CHUNK_PARALLELISM", "4"))
+
+# Longest run of missing values in a history that is interpolated; longer gaps are left missing
+MAX_INTERPOLATED_DAYS = 3
+
+# Process pool for Prophet/ARIMA fits, created in lifespan()
+FIT_WORKERS = int(os.getenv("FIT_WORKERS", str(os.cpu_count() or 1)))
+FIT_QUEUE_DEPTH = int(os.getenv("FIT_QUEUE_DEPTH", str(FIT_WORKERS * 2)))
+FIT_RETRY_AFTER = 5  # seconds suggested to clients when the pool is saturated
+fit_pool: Optional[FitPool] = None
+
+# Cache of fit results keyed by location, history range and model (MODEL_CACHE_MAX_MB=0 disables)
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", "64"))
+MODEL_CACHE_TTL = float(os.getenv("MODEL_CACHE_TTL", str(6 * 60 * 60)))
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "")
+forecast_cache = ForecastCache(
+    max_bytes=int(MODEL_CACHE_MAX_MB * 1024 * 1024),
+    ttl=MODEL_CACHE_TTL,
+    persist_dir=MODEL_CACHE_DIR or None
+) if MODEL_CACHE_MAX_MB > 0 else None
+
+# Per-location model states that new days are added to instead of refitting (MODEL_STATE_MAX_ENTRIES=0 disables).
+# A full refit still happens every MODEL_REFIT_DAYS, or when new observations miss the stored
+# forecast by more than MODEL_DRIFT_FACTOR times the fit's in-sample error.
+MODEL_STATE_MAX_ENTRIES = int(os.getenv("MODEL_STATE_MAX_ENTRIES", "1000"))
+MODEL_STATE_DIR = os.getenv("MODEL_STATE_DIR", "")
+MODEL_REFIT_DAYS = float(os.getenv("MODEL_REFIT_DAYS", "7"))
+MODEL_DRIFT_FACTOR = float(os.getenv("MODEL_DRIFT_FACTOR", "3"))
+model_states = ModelStateStore(
+    max_entries=MODEL_STATE_MAX_ENTRIES,
+    persist_dir=MODEL_STATE_DIR or None
+) if MODEL_STATE_MAX_ENTRIES > 0 else None
+
+# Forecasting engine used when a request doesn't name one
+FORECAST_MODEL = os.getenv("FORECAST_MODEL", DEFAULT_ENGINE).lower()
+if FORECAST_MODEL not in MODEL_ENGINES:
+    print(f"⚠ FORECAST_MODEL '{FORECAST_MODEL}' not available, using {DEFAULT_ENGINE}")
+    FORECAST_MODEL = DEFAULT_ENGINE
+
+# Engines pre-fitted on a tiny synthetic series at startup (WARMUP_MODELS="" disables warm-up)
+WARMUP_MODELS = [
+    key.strip().lower()
+    for key in os.getenv("WARMUP_MODELS", FORECAST_MODEL).split(",")
+    if key.strip().lower() in MODEL_ENGINES
+]
+# Per-engine readiness reported on /health: cold, warming, warm or failed
+engine_status: Dict[str, str] = {key: "cold" for key in MODEL_ENGINES}
+
+# Identical in-flight NASA fetches and model fits share one computation
+request_flights = SingleFlight()
+
+# Background refresh of the most requested locations every PREFETCH_INTERVAL seconds (0 disables)
+PREFETCH_INTERVAL = float(os.getenv("PREFETCH_INTERVAL", "300"))
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "20"))
+hot_locations = HotLocations()
+
+# Upper bound on locations accepted by the multi-location endpoints
+MAX_BATCH_LOCATIONS = int(os.getenv("MAX_BATCH_LOCATIONS", "100"))
+
+# Snap request coordinates to the NASA POWER grid cell so nearby points share fetches and fits
+SNAP_TO_GRID = os.getenv("SNAP_TO_GRID", "true").lower() in ("1", "true", "yes")
+
+# NASA variables /forecast can forecast, and those whose forecasts are clipped at zero
+FORECAST_VARIABLES = ("temperature", "rainfall", "windspeed")
+NON_NEGATIVE_VARIABLES = ("rainfall", "windspeed")
+
+# Response formats offered per endpoint via the Accept header; the first one is the default
+FORECAST_MEDIA_TYPES = [JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE]
+THIRTY_DAY_MEDIA_TYPES = [JSON_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE]
+BATCH_MEDIA_TYPES = [JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE]
+NDJSON_LINES_PER_CHUNK = 64
+# Representations vary with these request headers
+VARY_HEADERS = {"Vary": "Accept, Accept-Encoding"}
 
 class ForecastRequest(BaseModel):
     latitude: float
@@ -35,6 +216,9 @@ class ForecastRequest(BaseModel):
     start_date: str  # YYYYMMDD format
     end_date: str    # YYYYMMDD format
     forecast_months: Optional[int] = 12
+    snap_to_grid: Optional[bool] = None  # defaults to SNAP_TO_GRID
+    model: Optional[str] = None  # 'prophet', 'arima' or 'climatology'; defaults to FORECAST_MODEL
+    variables: Optional[List[str]] = None  # any of FORECAST_VARIABLES; temperature is always forecast
 
 class ForecastDataPoint(BaseModel):
     date: str  # ISO datetime
@@ -55,6 +239,21 @@ class RainfallPredictionResponse(BaseModel):
     predicted_rainfall_mm: float
     confidence: float
 
+class RainfallBatchRequest(BaseModel):
+    # Either three equal-length arrays...
+    temperature: Optional[List[float]] = None
+    humidity: Optional[List[float]] = None
+    pressure: Optional[List[float]] = None
+    # ...or a list of (temperature, humidity, pressure) triples
+    scenarios: Optional[List[Tuple[float, float, float]]] = None
+
+class RainfallBatchResponse(BaseModel):
+    count: int
+    rainfall_probability: List[float]
+    risk_level: List[str]
+    predicted_rainfall_mm: List[float]
+    confidence: List[float]
+
 class DailyPrediction(BaseModel):
     date: str
     temperature: float
@@ -69,11 +268,39 @@ class DailyPrediction(BaseModel):
 class ThirtyDayForecastRequest(BaseModel):
     latitude: float
     longitude: float
+    snap_to_grid: Optional[bool] = None  # defaults to SNAP_TO_GRID
+    ensemble_members: Optional[int] = None  # simulate this many members and add percentile bands
+    seed: Optional[int] = None  # makes the random variation reproducible
+
+class EnsembleDay(BaseModel):
+    date: str
+    # Percentile bands across members, keyed "p10", "p50", "p90"
+    temperature: Dict[str, float]
+    humidity: Dict[str, float]
+    pressure: Dict[str, float]
+    wind_speed: Dict[str, float]
+    predicted_rainfall_mm: Dict[str, float]
+    rainfall_probability: float  # mean across members
+    risk_probabilities: Dict[str, float]  # share of members at each risk level
+
+class EnsembleForecast(BaseModel):
+    members: int
+    seed: Optional[int] = None
+    percentiles: List[int]
+    days: List[EnsembleDay]
 
 class ThirtyDayForecastResponse(BaseModel):
     location: Dict[str, float]
     predictions: List[DailyPrediction]
     summary: Dict[str, Any]
+    ensemble: Optional[EnsembleForecast] = None
+
+class MultiLocationForecastRequest(BaseModel):
+    locations: List[ThirtyDayForecastRequest]
+
+class MultiLocationForecastResponse(BaseModel):
+    forecasts: List[Optional[ThirtyDayForecastResponse]]  # aligned with request.locations, null on failure
+    errors: List[Dict[str, Any]]
 
 class ForecastResponse(BaseModel):
     location: Dict[str, float]
@@ -84,111 +311,383 @@ class ForecastResponse(BaseModel):
     recommendations: List[str]
     model_used: str
 
-def fetch_nasa_power_data(lat: float, lon: float, start_date: str, end_date: str) -> pd.DataFrame:
-    """Fetch historical weather data from NASA POWER API"""
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-    parameters = "T2M,PRECTOTCORR,WS2M"
+class CandidateLocation(BaseModel):
+    latitude: float
+    longitude: float
+    name: Optional[str] = None
+
+class EventRankingRequest(BaseModel):
+    locations: List[CandidateLocation]
+    dates: List[str]  # YYYY-MM-DD or YYYYMMDD
+    top_k: int = 10
+    model: Optional[str] = None  # engine for the temperature forecast; defaults to FORECAST_MODEL
+    snap_to_grid: Optional[bool] = None  # defaults to SNAP_TO_GRID
+    weights: Optional[Dict[str, float]] = None  # overrides for EVENT_PENALTY_WEIGHTS
+
+class RankedEventOption(BaseModel):
+    location_index: int  # position in request.locations
+    name: Optional[str] = None
+    latitude: float
+    longitude: float
+    date: str
+    score: float  # 0-100, higher is better
+    temperature: float
+    wind_speed: float
+    rainfall_probability: float
+    penalties: Dict[str, float]  # 0-1 per weighted factor
+
+class EventRankingResponse(BaseModel):
+    evaluated: int  # location x date combinations scored
+    options: List[RankedEventOption]
+    errors: List[Dict[str, Any]]
+
+async def _request_nasa_power(lat: float, lon: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """Fetch a single date range from the NASA POWER API"""
+    url = f"{NASA_POWER_URL}?parameters={POWER_PARAMETERS}&start={start_date}&end={end_date}&latitude={lat}&longitude={lon}&format=JSON&community=AG"
+    
+    with stage("nasa_request"):
+        data = await nasa_client.get_json(url)
+    
+    with stage("parse"):
+        return parse_daily_point(data)
+
+async def fetch_nasa_power_data(lat: float, lon: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """Fetch historical weather data; concurrent identical fetches share one download"""
+    key = ("history", lat, lon, start_date, end_date)
+    return await request_flights.do(key, lambda: _load_nasa_power_data(lat, lon, start_date, end_date))
+
+def split_into_years(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Split [start, end] at calendar-year boundaries"""
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(end, datetime(chunk_start.year, 12, 31))
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+async def _fetch_ranges(lat: float, lon: float, ranges: List[Tuple[datetime, datetime]]) -> List[pd.DataFrame]:
+    """
+    Fetch date ranges as year-sized NASA requests, at most NASA_CHUNK_PARALLELISM at once.
+    Each chunk is retried on its own by the client and cached as soon as it arrives, so
+    if one chunk still fails, a retry of the request only has to fetch what is missing.
+    """
+    limit = asyncio.Semaphore(NASA_CHUNK_PARALLELISM)
+    
+    async def fetch_chunk(chunk_start: datetime, chunk_end: datetime) -> pd.DataFrame:
+        async with limit:
+            frame = await _request_nasa_power(lat, lon, chunk_start.strftime('%Y%m%d'), chunk_end.strftime('%Y%m%d'))
+        if nasa_cache is not None:
+            await asyncio.to_thread(nasa_cache.store, lat, lon, frame)
+        return frame
+    
+    chunks = [chunk for range_start, range_end in ranges for chunk in split_into_years(range_start, range_end)]
+    results = await asyncio.gather(*(fetch_chunk(*chunk) for chunk in chunks), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return list(results)
+
+def merge_history(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Combine history chunks into one frame sorted by date. NASA fill values become
+    NaN; days with no data at all are dropped, and runs of up to MAX_INTERPOLATED_DAYS
+    missing values are interpolated. Longer runs stay NaN rather than becoming a straight line.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=['date'] + CACHE_COLUMNS)
     
-    url = f"{base_url}?parameters={parameters}&start={start_date}&end={end_date}&latitude={lat}&longitude={lon}&format=JSON&community=AG"
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
     
+    values = df[CACHE_COLUMNS].astype(float).mask(lambda v: v == NASA_FILL_VALUE)
+    present = values.notna().any(axis=1)
+    df = df.loc[present, ['date']].reset_index(drop=True)
+    values = values.loc[present].reset_index(drop=True)
+    filled = values.interpolate(limit_direction='both')
+    for column in CACHE_COLUMNS:
+        # Each missing run shares its group with the last value before it, so the group's NaN count is the run length
+        missing = values[column].isna()
+        run_length = missing.groupby((~missing).cumsum()).transform('sum')
+        filled.loc[missing & (run_length > MAX_INTERPOLATED_DAYS), column] = np.nan
+    df[CACHE_COLUMNS] = filled
+    return df
+
+async def _load_nasa_power_data(lat: float, lon: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """Load historical weather data, serving cached days from disk and requesting only the gaps"""
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Extract parameters
-        params = data['properties']['parameter']
-        temperatures = params.get('T2M', {})
-        rainfall = params.get('PRECTOTCORR', {})
-        windspeed = params.get('WS2M', {})
-        
-        # Convert to DataFrame
-        dates = list(temperatures.keys())
-        df = pd.DataFrame({
-            'date': pd.to_datetime(dates, format='%Y%m%d'),
-            'temperature': [temperatures[d] for d in dates],
-            'rainfall': [rainfall.get(d, 0) for d in dates],
-            'windspeed': [windspeed.get(d, 0) for d in dates]
-        })
-        
-        return df
+        start_dt = datetime.strptime(start_date, '%Y%m%d')
+        end_dt = datetime.strptime(end_date, '%Y%m%d')
+        
+        if nasa_cache is None:
+            return merge_history(await _fetch_ranges(lat, lon, [(start_dt, end_dt)]))
+        
+        with stage("nasa_cache"):
+            cached = await asyncio.to_thread(nasa_cache.load, lat, lon, start_dt, end_dt)
+            unpublished = await asyncio.to_thread(nasa_cache.unpublished, lat, lon)
+        
+        # Fetch all gaps concurrently in year-sized chunks, skipping days NASA recently had no data for
+        gaps = nasa_cache.missing_ranges(cached, start_dt, end_dt, unpublished)
+        fetched_frames = await _fetch_ranges(lat, lon, gaps)
+        
+        return merge_history([cached] + fetched_frames)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"NASA API error: {str(e)}")
 
-def train_prophet_model(df: pd.DataFrame, column: str) -> List[Dict]:
-    """Train Prophet model and generate forecasts"""
-    prophet_df = df[['date', column]].rename(columns={'date': 'ds', column: 'y'})
+async def run_in_fit_pool(fn, *args) -> Any:
+    """Run fn(*args) in the process pool, rejecting the request if the pool is saturated or a worker died"""
+    try:
+        return await fit_pool.run(fn, *args)
+    except FitPoolSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Forecast capacity exhausted, please retry shortly ({e})",
+            headers={"Retry-After": str(FIT_RETRY_AFTER)}
+        )
+    except FitPoolBroken as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Forecast worker restarted, please retry shortly ({e})",
+            headers={"Retry-After": str(FIT_RETRY_AFTER)}
+        )
+
+async def run_model_fit(train_fn, df: pd.DataFrame, column: str) -> List[Dict]:
+    """Run a model fit in the process pool"""
+    result, timings = await run_in_fit_pool(train_with_timings, train_fn, df[['date', column]], column)
+    # Steps timed inside the worker; the rest of the "fit" stage is queueing and pickling
+    for name, seconds in timings.items():
+        record_stage(name, seconds)
+    return result
+
+async def run_incremental_fit(engine: str, df: pd.DataFrame, lat: float, lon: float, start_date: str,
+                              column: str) -> List[Dict]:
+    """
+    Run a model fit in the process pool, updating the location's stored model
+    state when the history has only gained days since it was fitted, and
+    serving the state's forecast when the history hasn't changed at all.
+    """
+    state_key = (lat, lon, start_date, engine, column)
+    history = df[['date', column]]
+    state = model_states.get(state_key)
+    if state is not None and state.covers(history):
+        # Same history as the stored fit, e.g. a repeat request after the forecast cache entry expired
+        model_states.record_reuse()
+        return state.result
+    reason = state.refit_reason(history, MODEL_REFIT_DAYS * 86400, MODEL_DRIFT_FACTOR) if state else "no_state"
     
-    model = Prophet(
-        daily_seasonality=False,
-        weekly_seasonality=True,
-        yearly_seasonality=True,
-        seasonality_mode='multiplicative'
-    )
-    model.fit(prophet_df)
+    if reason is None:
+        result, new_state, timings = await run_in_fit_pool(update_model_state, engine, state, history, column)
+        if new_state is None or new_state.updates == 0:
+            reason = "update_failed"
+    else:
+        result, new_state, timings = await run_in_fit_pool(fit_model_state, engine, history, column)
     
-    # Generate future dates (365 days = ~12 months)
-    future = model.make_future_dataframe(periods=365, freq='D')
-    forecast = model.predict(future)
+    model_states.record(reason)
+    MODEL_FITS.inc(kind="full" if reason else "incremental", reason=reason or "")
+    if new_state is not None:
+        model_states.put(state_key, new_state)
+    for name, seconds in timings.items():
+        record_stage(name, seconds)
+    return result
+
+def forecast_cache_key(lat: float, lon: float, start_date: str, end_date: str,
+                       engine: str, column: str) -> Tuple:
+    return (lat, lon, start_date, end_date, engine, column)
+
+async def get_forecast_series(df: pd.DataFrame, lat: float, lon: float, start_date: str,
+                              end_date: str, engine: str, column: str, refresh: bool = False) -> List[Dict]:
+    """
+    Return the forecast for a location/history window from cache, or fit it once
+    for all concurrent callers. With refresh, the cached forecast is replaced.
+    """
+    cache_key = forecast_cache_key(lat, lon, start_date, end_date, engine, column)
+    series = forecast_cache.get(cache_key) if forecast_cache and not refresh else None
+    if series is not None:
+        return series
     
-    # Extract only future predictions
-    future_forecast = forecast[forecast['ds'] > df['date'].max()]
+    async def fit() -> List[Dict]:
+        forecast_engine = MODEL_ENGINES[engine]
+        if forecast_engine.inline:
+            result, timings = train_with_timings(forecast_engine.train, df[['date', column]], column)
+            for name, seconds in timings.items():
+                record_stage(name, seconds)
+        elif model_states is not None and forecast_engine.fit_state is not None:
+            result = await run_incremental_fit(engine, df, lat, lon, start_date, column)
+        else:
+            result = await run_model_fit(forecast_engine.train, df, column)
+        if forecast_cache:
+            forecast_cache.put(cache_key, result)
+        return result
     
-    return [
-        {
-            'date': row['ds'].isoformat(),
-            'value': float(row['yhat']),
-            'lower': float(row['yhat_lower']),
-            'upper': float(row['yhat_upper'])
-        }
-        for _, row in future_forecast.iterrows()
-    ]
+    return await request_flights.do(("fit",) + cache_key, fit)
 
-def train_arima_model(df: pd.DataFrame, column: str) -> List[Dict]:
-    """Fallback ARIMA model for forecasting"""
-    values = df[column].values
-    
+async def warm_up_on_startup() -> None:
+    """Warm inline engines in this process and pooled engines in every fit worker"""
+    inline = [key for key in WARMUP_MODELS if MODEL_ENGINES[key].inline]
+    pooled = [key for key in WARMUP_MODELS if not MODEL_ENGINES[key].inline]
     try:
-        # Fit ARIMA model (p=5, d=1, q=0)
-        model = ARIMA(values, order=(5, 1, 0))
-        fitted = model.fit()
-        
-        # Forecast 365 days
-        forecast = fitted.forecast(steps=365)
-        
-        # Generate future dates
-        last_date = df['date'].max()
-        future_dates = [last_date + timedelta(days=i+1) for i in range(365)]
-        
-        # Calculate simple confidence intervals (±10%)
-        return [
-            {
-                'date': date.isoformat(),
-                'value': float(val),
-                'lower': float(val * 0.9),
-                'upper': float(val * 1.1)
-            }
-            for date, val in zip(future_dates, forecast)
-        ]
+        if inline:
+            engine_status.update(await asyncio.to_thread(warm_up_engines, inline))
+        if pooled:
+            # Each worker warms up in the pool initializer before answering
+            reports = await fit_pool.start_workers(get_warmup_status)
+            for key in pooled:
+                engine_status[key] = "warm" if all(r.get(key) == "warm" for r in reports) else "failed"
     except Exception as e:
-        print(f"ARIMA error: {e}")
-        # Fallback to simple mean projection
-        mean_val = values.mean()
-        last_date = df['date'].max()
-        future_dates = [last_date + timedelta(days=i+1) for i in range(365)]
-        
-        return [
-            {
-                'date': date.isoformat(),
-                'value': float(mean_val),
-                'lower': float(mean_val * 0.9),
-                'upper': float(mean_val * 1.1)
-            }
-            for date in future_dates
-        ]
+        print(f"⚠ Warm-up failed: {e}")
+        for key in WARMUP_MODELS:
+            if engine_status[key] == "warming":
+                engine_status[key] = "failed"
+
+async def prefetch_location(key: Tuple) -> bool:
+    """
+    Refresh one hot key off the request path: the recent NASA history behind a
+    thirty-day forecast, or the history and fit behind a /forecast when its
+    cached forecast would expire before the next tick. Returns whether it did any work.
+    """
+    kind, lat, lon, *rest = key
+    if kind == "thirty_day":
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=90)
+        await fetch_nasa_power_data(lat, lon, start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'))
+        return True
+    
+    start_date, end_date, engine, column = rest
+    if forecast_cache is None:
+        return False
+    stored_at = forecast_cache.stored_at(forecast_cache_key(lat, lon, start_date, end_date, engine, column))
+    if stored_at is not None and stored_at + forecast_cache.ttl - time.time() > 2 * PREFETCH_INTERVAL:
+        return False
+    df = await fetch_nasa_power_data(lat, lon, start_date, end_date)
+    if df.empty:
+        return False
+    await get_forecast_series(df, lat, lon, start_date, end_date, engine, column, refresh=stored_at is not None)
+    return True
+
+def service_idle() -> bool:
+    """True while a fit worker is free and no request is queued for admission"""
+    pool_free = fit_pool is not None and fit_pool.pending < fit_pool.workers
+    return pool_free and all(limiter.waiting == 0 for limiter in admission_limiters.values())
+
+prefetch_scheduler = PrefetchScheduler(
+    hot_locations, prefetch_location, PREFETCH_INTERVAL, PREFETCH_TOP_N, idle=service_idle
+)
+
+def resolve_engine(model: Optional[str]) -> str:
+    """Engine key for a request, defaulting to FORECAST_MODEL"""
+    engine = (model or FORECAST_MODEL).lower()
+    if engine not in MODEL_ENGINES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown or unavailable model '{model}'. Available: {', '.join(sorted(MODEL_ENGINES))}"
+        )
+    return engine
+
+def resolve_variables(variables: Optional[List[str]]) -> List[str]:
+    """Variables to forecast for a request, temperature first and the rest in FORECAST_VARIABLES order"""
+    requested = {v.lower() for v in variables or []}
+    unknown = requested - set(FORECAST_VARIABLES)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown variables {', '.join(sorted(unknown))}. Available: {', '.join(FORECAST_VARIABLES)}"
+        )
+    return [v for v in FORECAST_VARIABLES if v == "temperature" or v in requested]
+
+def resolve_location(lat: float, lon: float, snap: Optional[bool]) -> Tuple[float, float]:
+    """Coordinates used for data access and model work: the NASA grid cell center when snapping is on"""
+    use_grid = SNAP_TO_GRID if snap is None else snap
+    if use_grid:
+        return snap_to_grid(lat, lon)
+    return lat, lon
 
-def generate_recommendations(df: pd.DataFrame, temp_forecast: List[Dict]) -> List[str]:
-    """Generate weather-based recommendations"""
+def encoded_response(body: bytes, media_type: str, encoding: Optional[str],
+                     headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response for an already serialized body, compressed when the client accepts it and it's worth it"""
+    headers = {**VARY_HEADERS, **(headers or {})}
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def streaming_response(chunks, encoding: Optional[str]) -> StreamingResponse:
+    """NDJSON response compressing each chunk as it is sent; chunks may be a sync or async iterable"""
+    compressor = StreamCompressor(encoding)
+    headers = {**VARY_HEADERS, **({"Content-Encoding": encoding} if encoding else {})}
+    
+    if hasattr(chunks, "__aiter__"):
+        async def body():
+            async for chunk in chunks:
+                yield compressor.compress(chunk)
+            yield compressor.finish()
+    else:
+        def body():
+            for chunk in chunks:
+                yield compressor.compress(chunk)
+            yield compressor.finish()
+    
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+def stream_ndjson(header: Dict[str, Any], rows: Iterable[Dict[str, Any]], encoding: Optional[str]) -> StreamingResponse:
+    """
+    Stream a header object followed by one JSON line per row. Rows are
+    serialized as the body is sent, in chunks of NDJSON_LINES_PER_CHUNK lines.
+    """
+    def lines():
+        yield json.dumps(header) + "\n"
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(row))
+            if len(chunk) == NDJSON_LINES_PER_CHUNK:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+    
+    return streaming_response(lines(), encoding)
+
+def extra_variable_values(series: Dict[str, List[Dict]], days: int) -> Dict[str, List[float]]:
+    """Point forecasts of the variables other than temperature, aligned day by day with its points"""
+    values = {}
+    for variable, points in series.items():
+        if variable == "temperature":
+            continue
+        column = np.array([p['value'] for p in points[:days]], dtype=float)
+        if variable in NON_NEGATIVE_VARIABLES:
+            column = np.maximum(column, 0.0)
+        values[variable] = column.tolist()
+    return values
+
+def forecast_columns(points: List[Dict], digits: Optional[int] = None,
+                     extra: Optional[Dict[str, List[float]]] = None) -> Dict[str, Any]:
+    """
+    Forecast points as one array per field; dates are consecutive days counted
+    from start, which is left out when there are no points.
+    """
+    columns = {
+        "temperature": np.array([p['value'] for p in points], dtype=float),
+        "temperature_lower": np.array([p['lower'] for p in points], dtype=float),
+        "temperature_upper": np.array([p['upper'] for p in points], dtype=float),
+        **{name: np.array(values, dtype=float) for name, values in (extra or {}).items()}
+    }
+    return {
+        **({"start": points[0]['date'][:10]} if points else {}),
+        "step_days": 1,
+        "count": len(points),
+        **{
+            name: (np.round(values, digits) if digits is not None else values).tolist()
+            for name, values in columns.items()
+        }
+    }
+
+def generate_recommendations(df: pd.DataFrame, temp_forecast: List[Dict],
+                             normals: Optional[Dict[str, np.ndarray]] = None) -> List[str]:
+    """
+    Generate weather-based recommendations. When climatological normals for the
+    forecast window are given, they replace the requested history as the baseline,
+    so the forecast is compared against the same season rather than the whole year.
+    """
     recommendations = []
     
     # Historical analysis
@@ -198,6 +697,10 @@ def generate_recommendations(df: pd.DataFrame, temp_forecast: List[Dict]) -> Lis
     avg_rain = df['rainfall'].mean()
     max_rain = df['rainfall'].max()
     avg_wind = df['windspeed'].mean()
+    if normals is not None:
+        avg_temp = float(normals['temperature_mean'].mean())
+        avg_rain = float(normals['rainfall_mean'].mean())
+        avg_wind = float(normals['windspeed_mean'].mean())
     
     # Forecast analysis
     forecast_temps = [f['value'] for f in temp_forecast[:90]]  # Next 3 months
@@ -246,13 +749,66 @@ def read_root():
     return {
         "service": "NASA Weather Forecast Service",
         "status": "running",
-        "model": "Prophet" if USE_PROPHET else "ARIMA",
-        "endpoints": ["/forecast", "/predict-rainfall", "/thirty-day-forecast", "/health"]
+        "model": MODEL_ENGINES[FORECAST_MODEL].name,
+        "available_models": sorted(MODEL_ENGINES),
+        "endpoints": [
+            "/forecast",
+            "/predict-rainfall",
+            "/predict-rainfall/batch",
+            "/thirty-day-forecast",
+            "/thirty-day-forecast/batch",
+            "/rank-event-dates",
+            "/health",
+            "/cache-stats",
+            "/metrics"
+        ]
     }
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "model": "Prophet" if USE_PROPHET else "ARIMA"}
+def health_check(response: Response):
+    """
+    Readiness check: 503 until every engine in WARMUP_MODELS is warm. An engine
+    whose warm-up failed keeps the replica unready, since its first requests
+    would pay the cold start (or fail) that warm-up was meant to take.
+    """
+    failed = "failed" in engine_status.values()
+    ready = not failed and "warming" not in engine_status.values()
+    if not ready:
+        response.status_code = 503
+    return {
+        "status": "healthy" if ready else "failed" if failed else "warming",
+        "ready": ready,
+        "model": MODEL_ENGINES[FORECAST_MODEL].name,
+        "engines": engine_status
+    }
+
+@app.get("/cache-stats")
+def cache_stats():
+    """Hit/miss counters for the fitted-forecast cache, coalesced requests, model updates and prefetching"""
+    return {
+        "forecast_cache": forecast_cache.stats() if forecast_cache else {"enabled": False},
+        "request_coalescing": request_flights.stats(),
+        "model_states": model_states.stats() if model_states else {"enabled": False},
+        "prefetch": prefetch_scheduler.stats() if PREFETCH_INTERVAL > 0 else {"enabled": False}
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus metrics: request and stage latency histograms, upstream outcomes, in-flight gauges"""
+    if fit_pool is not None:
+        FIT_POOL_PENDING.set(fit_pool.pending)
+        FIT_POOL_CAPACITY.set(fit_pool.capacity)
+        FIT_POOL_RESTARTS.set(fit_pool.restarts)
+    if forecast_cache:
+        for name, value in forecast_cache.stats().items():
+            if name in ("entries", "bytes", "hits", "disk_hits", "misses", "evictions"):
+                FORECAST_CACHE_STATS.set(value, stat=name)
+    for name, value in request_flights.stats().items():
+        COALESCING_STATS.set(value, stat=name)
+    for path, limiter in admission_limiters.items():
+        ADMISSION_SLOTS.set(limiter.active, endpoint=path, state="active")
+        ADMISSION_SLOTS.set(limiter.waiting, endpoint=path, state="waiting")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 def predict_rainfall(temperature: float, humidity: float, pressure: float) -> Dict[str, Any]:
     """
@@ -332,6 +888,65 @@ def predict_rainfall(temperature: float, humidity: float, pressure: float) -> Di
         "confidence": round(confidence, 3)
     }
 
+def predict_rainfall_batch(temperature: np.ndarray, humidity: np.ndarray, pressure: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized predict_rainfall over arrays of any (broadcastable) shape.
+    Applies exactly the same arithmetic as the scalar version but returns
+    unrounded values; round with the scalar digits to get identical output.
+    """
+    temperature = np.asarray(temperature, dtype=float)
+    humidity = np.asarray(humidity, dtype=float)
+    pressure = np.asarray(pressure, dtype=float)
+    
+    pressure_deviation = np.abs(pressure - 1013)
+    humidity_factor = np.maximum(0, (humidity - 40) / 60)
+    pressure_factor = np.where(pressure < 1013, np.minimum(1, pressure_deviation / 30), 0)
+    
+    ideal_temp = (temperature >= 15) & (temperature <= 25)
+    near_temp = ((temperature >= 10) & (temperature < 15)) | ((temperature > 25) & (temperature <= 30))
+    temp_factor = np.select([ideal_temp, near_temp], [0.8, 0.5], 0.2)
+    
+    base_probability = (
+        humidity_factor * 0.5 + 
+        pressure_factor * 0.3 + 
+        temp_factor * 0.2
+    )
+    base_probability = np.select(
+        [humidity < 50, humidity < 70],
+        [base_probability * 0.3, base_probability * 0.6],
+        base_probability
+    )
+    rainfall_probability = np.minimum(0.95, np.maximum(0.05, base_probability))
+    
+    rain_scale = np.select([rainfall_probability > 0.7, rainfall_probability > 0.4], [15, 8], 3)
+    predicted_rainfall = (humidity / 100) * (rainfall_probability * rain_scale)
+    
+    risk_level = np.select(
+        [
+            (rainfall_probability > 0.65) & (predicted_rainfall > 8),
+            (rainfall_probability > 0.35) | (predicted_rainfall > 3)
+        ],
+        ["high", "moderate"],
+        "low"
+    )
+    
+    confidence = np.full(np.broadcast(temperature, humidity, pressure).shape, 0.6)
+    confidence = confidence + np.where((humidity > 80) | (humidity < 30), 0.15, 0)
+    confidence = confidence + np.where(pressure_deviation > 20, 0.15, 0)
+    confidence = confidence + np.where(ideal_temp, 0.1, 0)
+    confidence = np.minimum(0.95, confidence)
+    
+    return {
+        "rainfall_probability": rainfall_probability,
+        "risk_level": risk_level,
+        "predicted_rainfall_mm": predicted_rainfall,
+        "confidence": confidence
+    }
+
+def _round_array(values: np.ndarray, digits: int) -> List[float]:
+    # Python's round() rather than np.round so batch output matches predict_rainfall exactly
+    return [round(v, digits) for v in values.tolist()]
+
 @app.post("/predict-rainfall", response_model=RainfallPredictionResponse)
 async def predict_rainfall_endpoint(request: RainfallPredictionRequest):
     """
@@ -348,13 +963,220 @@ async def predict_rainfall_endpoint(request: RainfallPredictionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-@app.post("/thirty-day-forecast", response_model=ThirtyDayForecastResponse)
-async def thirty_day_forecast(request: ThirtyDayForecastRequest):
+@app.post("/predict-rainfall/batch", response_model=RainfallBatchResponse)
+async def predict_rainfall_batch_endpoint(request: RainfallBatchRequest):
     """
-    Generate 30-day weather forecast with AI-based rainfall predictions.
-    This combines historical data patterns with current conditions.
+    Score many (temperature, humidity, pressure) scenarios in one vectorized pass.
+    Results are identical to calling /predict-rainfall once per scenario.
     """
+    if request.scenarios is not None:
+        triples = np.asarray(request.scenarios, dtype=float).reshape(-1, 3)
+        temperature, humidity, pressure = triples[:, 0], triples[:, 1], triples[:, 2]
+    elif request.temperature is not None and request.humidity is not None and request.pressure is not None:
+        if not len(request.temperature) == len(request.humidity) == len(request.pressure):
+            raise HTTPException(status_code=422, detail="temperature, humidity and pressure must have the same length")
+        temperature, humidity, pressure = request.temperature, request.humidity, request.pressure
+    else:
+        raise HTTPException(status_code=422, detail="Provide either scenarios or temperature, humidity and pressure arrays")
+    
     try:
+        result = predict_rainfall_batch(temperature, humidity, pressure)
+        return RainfallBatchResponse(
+            count=len(result["risk_level"]),
+            rainfall_probability=_round_array(result["rainfall_probability"], 3),
+            risk_level=result["risk_level"].tolist(),
+            predicted_rainfall_mm=_round_array(result["predicted_rainfall_mm"], 2),
+            confidence=_round_array(result["confidence"], 3)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+THIRTY_DAY_HORIZON = 30
+
+# Ensemble mode of /thirty-day-forecast: member limit and the percentiles reported per day
+MAX_ENSEMBLE_MEMBERS = int(os.getenv("MAX_ENSEMBLE_MEMBERS", "5000"))
+ENSEMBLE_PERCENTILES = (10, 50, 90)
+
+def history_baseline(df: pd.DataFrame, end_date: datetime) -> Dict[str, Any]:
+    """Expected daily conditions over the horizon from recent history plus a seasonal sine wave"""
+    # Calculate average conditions for baseline predictions
+    avg_temp = df['temperature'].mean()
+    avg_windspeed = df['windspeed'].mean()
+    
+    pred_dates = pd.date_range(end_date + timedelta(days=1), periods=THIRTY_DAY_HORIZON, freq='D')
+    
+    # Use seasonal variation (simplified sine wave based on day of year)
+    day_of_year = pred_dates.dayofyear.to_numpy()
+    seasonal_temp_variation = 10 * np.sin(2 * np.pi * day_of_year / 365)
+    
+    # Day-to-day temperature spread around a weekly running mean
+    temp_noise = df['temperature'] - df['temperature'].rolling(7, center=True, min_periods=1).mean()
+    
+    return {
+        "dates": pred_dates,
+        "temperature": avg_temp + seasonal_temp_variation,
+        "temperature_std": np.full(THIRTY_DAY_HORIZON, float(np.nan_to_num(temp_noise.std()))),
+        "reference_temperature": avg_temp,
+        "windspeed": np.full(THIRTY_DAY_HORIZON, avg_windspeed),
+        "windspeed_std": np.full(THIRTY_DAY_HORIZON, 2.0)
+    }
+
+def normals_baseline(normals: Dict[str, np.ndarray], annual_temp: float, end_date: datetime) -> Dict[str, Any]:
+    """Expected daily conditions over the horizon from climatology index normals"""
+    return {
+        "dates": pd.date_range(end_date + timedelta(days=1), periods=THIRTY_DAY_HORIZON, freq='D'),
+        "temperature": normals['temperature_mean'].astype(float),
+        "temperature_std": np.sqrt(normals['temperature_var'].astype(float)),
+        "reference_temperature": annual_temp,
+        "windspeed": normals['windspeed_mean'].astype(float),
+        "windspeed_std": np.sqrt(normals['windspeed_var'].astype(float))
+    }
+
+def simulate_conditions(baseline: Dict[str, Any], rng: np.random.Generator,
+                        members: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Draw daily temperature, humidity, pressure and wind speed around a baseline.
+    Without members, one draw of shape (horizon,) with temperature kept at the
+    baseline; with members, all members at once with shape (members, horizon).
+    """
+    shape = (THIRTY_DAY_HORIZON,) if members is None else (members, THIRTY_DAY_HORIZON)
+    
+    # Predicted temperature with some variation
+    pred_temp = np.broadcast_to(baseline["temperature"], shape)
+    if members is not None:
+        pred_temp = pred_temp + rng.standard_normal(shape) * baseline["temperature_std"]
+    
+    # Estimate humidity (inverse relationship with temp, simplified)
+    pred_humidity = np.clip(70 - (pred_temp - baseline["reference_temperature"]) * 1.5, 30, 95)
+    
+    # Pressure variation (random walk around standard pressure)
+    pred_pressure = 1013 + rng.normal(0, 8, shape)
+    
+    # Wind speed with some randomness
+    pred_windspeed = np.maximum(0, baseline["windspeed"] + rng.standard_normal(shape) * baseline["windspeed_std"])
+    
+    return {
+        "temperature": pred_temp,
+        "humidity": pred_humidity,
+        "pressure": pred_pressure,
+        "windspeed": pred_windspeed
+    }
+
+def build_daily_predictions(baseline: Dict[str, Any], rng: np.random.Generator) -> List[DailyPrediction]:
+    """Generate the daily predictions for the next THIRTY_DAY_HORIZON days as arrays over the whole horizon"""
+    conditions = simulate_conditions(baseline, rng)
+    return score_daily_conditions(
+        baseline["dates"], conditions["temperature"], conditions["humidity"],
+        conditions["pressure"], conditions["windspeed"]
+    )
+
+def _percentile_bands(values: np.ndarray, digits: int) -> List[Dict[str, float]]:
+    """Per-day {"p10": ..., "p50": ..., "p90": ...} from (ENSEMBLE_PERCENTILES, horizon) values"""
+    keys = [f"p{p}" for p in ENSEMBLE_PERCENTILES]
+    return [dict(zip(keys, day)) for day in np.round(values, digits).T.tolist()]
+
+def build_ensemble(baseline: Dict[str, Any], rng: np.random.Generator,
+                   members: int) -> Tuple["EnsembleForecast", Dict[str, np.ndarray]]:
+    """
+    Simulate all members over the whole horizon in one batch, score them with
+    predict_rainfall_batch and reduce to per-day percentiles and risk probabilities.
+    Also returns the per-day median conditions.
+    """
+    conditions = simulate_conditions(baseline, rng, members)
+    rainfall = predict_rainfall_batch(conditions["temperature"], conditions["humidity"], conditions["pressure"])
+    
+    # One percentile pass over every variable: (percentiles, variable, day)
+    stacked = np.stack([
+        conditions["temperature"], conditions["humidity"], conditions["pressure"],
+        conditions["windspeed"], rainfall["predicted_rainfall_mm"]
+    ])
+    bands = np.percentile(stacked, ENSEMBLE_PERCENTILES, axis=1)
+    medians = np.median(stacked[:4], axis=1)
+    
+    risk = rainfall["risk_level"]
+    risk_probabilities = {level: (risk == level).mean(axis=0) for level in ("high", "moderate", "low")}
+    rain_probability = rainfall["rainfall_probability"].mean(axis=0)
+    
+    temperature, humidity, pressure, wind, rain_mm = (_percentile_bands(bands[:, k], 2) for k in range(5))
+    days = [
+        EnsembleDay(
+            date=date,
+            temperature=temperature[i],
+            humidity=humidity[i],
+            pressure=pressure[i],
+            wind_speed=wind[i],
+            predicted_rainfall_mm=rain_mm[i],
+            rainfall_probability=round(float(rain_probability[i]), 3),
+            risk_probabilities={level: round(float(p[i]), 3) for level, p in risk_probabilities.items()}
+        )
+        for i, date in enumerate(baseline["dates"].strftime('%Y-%m-%d'))
+    ]
+    median_conditions = dict(zip(["temperature", "humidity", "pressure", "windspeed"], medians))
+    return EnsembleForecast(members=members, percentiles=list(ENSEMBLE_PERCENTILES), days=days), median_conditions
+
+def score_daily_conditions(pred_dates: pd.DatetimeIndex, pred_temp: np.ndarray, pred_humidity: np.ndarray,
+                           pred_pressure: np.ndarray, pred_windspeed: np.ndarray) -> List[DailyPrediction]:
+    """Rainfall predictions and descriptions for daily conditions over the horizon"""
+    # Use our rainfall prediction model
+    rainfall_pred = predict_rainfall_batch(pred_temp, pred_humidity, pred_pressure)
+    rainfall_probability = np.round(rainfall_pred['rainfall_probability'], 3)
+    
+    # Determine weather description based on predictions
+    weather_desc = np.select(
+        [rainfall_probability > 0.7, rainfall_probability > 0.4, pred_temp > 30, pred_temp < 10],
+        ["Rainy", "Partly Cloudy", "Hot and Sunny", "Cold and Clear"],
+        "Clear"
+    )
+    
+    columns = zip(
+        pred_dates.strftime('%Y-%m-%d'),
+        np.round(pred_temp, 1).tolist(),
+        np.round(pred_humidity, 1).tolist(),
+        np.round(pred_pressure, 1).tolist(),
+        np.round(pred_windspeed, 1).tolist(),
+        rainfall_probability.tolist(),
+        np.round(rainfall_pred['predicted_rainfall_mm'], 2).tolist(),
+        rainfall_pred['risk_level'].tolist(),
+        weather_desc.tolist()
+    )
+    return [
+        DailyPrediction(
+            date=date,
+            temperature=temp,
+            humidity=humidity,
+            pressure=pressure,
+            wind_speed=wind,
+            rainfall_probability=probability,
+            predicted_rainfall_mm=rainfall_mm,
+            risk_level=risk,
+            weather_description=desc
+        )
+        for date, temp, humidity, pressure, wind, probability, rainfall_mm, risk, desc in columns
+    ]
+
+def summarize_daily_predictions(predictions: List[DailyPrediction]) -> Dict[str, Any]:
+    risk_levels = [p.risk_level for p in predictions]
+    avg_pred_temp = sum(p.temperature for p in predictions) / len(predictions)
+    total_pred_rainfall = sum(p.predicted_rainfall_mm for p in predictions)
+    
+    return {
+        "high_risk_days": risk_levels.count('high'),
+        "moderate_risk_days": risk_levels.count('moderate'),
+        "low_risk_days": risk_levels.count('low'),
+        "average_temperature": round(avg_pred_temp, 1),
+        "total_predicted_rainfall": round(total_pred_rainfall, 1),
+        "forecast_period": f"{predictions[0].date} to {predictions[-1].date}"
+    }
+
+async def compute_thirty_day_forecast(request: ThirtyDayForecastRequest) -> ThirtyDayForecastResponse:
+    if request.ensemble_members is not None and not 1 <= request.ensemble_members <= MAX_ENSEMBLE_MEMBERS:
+        raise HTTPException(status_code=422, detail=f"ensemble_members must be between 1 and {MAX_ENSEMBLE_MEMBERS}")
+    if request.seed is not None and request.seed < 0:
+        raise HTTPException(status_code=422, detail="seed must be a non-negative integer")
+    
+    try:
+        lat, lon = resolve_location(request.latitude, request.longitude, request.snap_to_grid)
+        
         # Calculate date range for historical data (last 90 days)
         end_date = datetime.now()
         start_date = end_date - timedelta(days=90)
@@ -362,93 +1184,66 @@ async def thirty_day_forecast(request: ThirtyDayForecastRequest):
         start_str = start_date.strftime('%Y%m%d')
         end_str = end_date.strftime('%Y%m%d')
         
-        # Fetch historical data from NASA
-        df = fetch_nasa_power_data(
-            request.latitude,
-            request.longitude,
-            start_str,
-            end_str
-        )
-        
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No historical data available")
-        
-        # Calculate average conditions for baseline predictions
-        avg_temp = df['temperature'].mean()
-        avg_rainfall = df['rainfall'].mean()
-        avg_windspeed = df['windspeed'].mean()
+        # Indexed locations are served from the climatology index, without a NASA request
+        normals = None
+        if climatology_index is not None:
+            with stage("climatology_index"):
+                normals = climatology_index.window(lat, lon, end_date + timedelta(days=1), THIRTY_DAY_HORIZON)
         
-        # Generate 30 daily predictions
-        predictions = []
-        for day_offset in range(30):
-            pred_date = end_date + timedelta(days=day_offset + 1)
-            
-            # Use seasonal variation (simplified sine wave based on day of year)
-            day_of_year = pred_date.timetuple().tm_yday
-            seasonal_temp_variation = 10 * np.sin(2 * np.pi * day_of_year / 365)
-            
-            # Predicted temperature with some variation
-            pred_temp = avg_temp + seasonal_temp_variation
-            
-            # Estimate humidity (inverse relationship with temp, simplified)
-            pred_humidity = max(30, min(95, 70 - (pred_temp - avg_temp) * 1.5))
-            
-            # Pressure variation (random walk around standard pressure)
-            pred_pressure = 1013 + np.random.normal(0, 8)
-            
-            # Wind speed with some randomness
-            pred_windspeed = max(0, avg_windspeed + np.random.normal(0, 2))
+        if normals is not None:
+            annual_temp = climatology_index.annual_mean(lat, lon, "temperature_mean")
+            baseline = normals_baseline(normals, annual_temp, end_date)
+        else:
+            hot_locations.record(("thirty_day", lat, lon))
+            # Fetch historical data from NASA
+            with stage("fetch"):
+                df = await fetch_nasa_power_data(
+                    lat,
+                    lon,
+                    start_str,
+                    end_str
+                )
             
-            # Use our rainfall prediction model
-            rainfall_pred = predict_rainfall(pred_temp, pred_humidity, pred_pressure)
+            if df.empty:
+                raise HTTPException(status_code=404, detail="No historical data available")
             
-            # Determine weather description based on predictions
-            if rainfall_pred['rainfall_probability'] > 0.7:
-                weather_desc = "Rainy"
-            elif rainfall_pred['rainfall_probability'] > 0.4:
-                weather_desc = "Partly Cloudy"
-            elif pred_temp > 30:
-                weather_desc = "Hot and Sunny"
-            elif pred_temp < 10:
-                weather_desc = "Cold and Clear"
+            baseline = history_baseline(df, end_date)
+        
+        # Seeded requests are reproducible; unseeded ensembles report the seed they used
+        seed = request.seed
+        if seed is None and request.ensemble_members:
+            seed = secrets.randbits(32)
+        rng = np.random.default_rng(seed)
+        
+        ensemble = None
+        with stage("predict"):
+            if request.ensemble_members:
+                ensemble, median = build_ensemble(baseline, rng, request.ensemble_members)
+                ensemble.seed = seed
+                # The headline predictions follow the ensemble median
+                predictions = score_daily_conditions(
+                    baseline["dates"], median["temperature"], median["humidity"],
+                    median["pressure"], median["windspeed"]
+                )
             else:
-                weather_desc = "Clear"
-            
-            predictions.append(DailyPrediction(
-                date=pred_date.strftime('%Y-%m-%d'),
-                temperature=round(pred_temp, 1),
-                humidity=round(pred_humidity, 1),
-                pressure=round(pred_pressure, 1),
-                wind_speed=round(pred_windspeed, 1),
-                rainfall_probability=rainfall_pred['rainfall_probability'],
-                predicted_rainfall_mm=rainfall_pred['predicted_rainfall_mm'],
-                risk_level=rainfall_pred['risk_level'],
-                weather_description=weather_desc
-            ))
+                predictions = build_daily_predictions(baseline, rng)
         
-        # Calculate summary statistics
-        high_risk_days = sum(1 for p in predictions if p.risk_level == 'high')
-        moderate_risk_days = sum(1 for p in predictions if p.risk_level == 'moderate')
-        low_risk_days = sum(1 for p in predictions if p.risk_level == 'low')
-        avg_pred_temp = sum(p.temperature for p in predictions) / len(predictions)
-        total_pred_rainfall = sum(p.predicted_rainfall_mm for p in predictions)
-        
-        summary = {
-            "high_risk_days": high_risk_days,
-            "moderate_risk_days": moderate_risk_days,
-            "low_risk_days": low_risk_days,
-            "average_temperature": round(avg_pred_temp, 1),
-            "total_predicted_rainfall": round(total_pred_rainfall, 1),
-            "forecast_period": f"{predictions[0].date} to {predictions[-1].date}"
-        }
+        with stage("summary"):
+            summary = summarize_daily_predictions(predictions)
+            summary["data_source"] = "climatology_index" if normals is not None else "nasa_history"
+            if normals is not None:
+                summary["climatological_rain_days"] = round(float(normals['rain_day_frequency'].sum()), 1)
         
         return ThirtyDayForecastResponse(
             location={
                 "latitude": request.latitude,
-                "longitude": request.longitude
+                "longitude": request.longitude,
+                "grid_latitude": lat,
+                "grid_longitude": lon
             },
             predictions=predictions,
-            summary=summary
+            summary=summary,
+            ensemble=ensemble
         )
         
     except HTTPException:
@@ -456,89 +1251,491 @@ async def thirty_day_forecast(request: ThirtyDayForecastRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Forecast generation failed: {str(e)}")
 
-@app.post("/forecast", response_model=ForecastResponse)
-async def generate_forecast(request: ForecastRequest):
+def thirty_day_columns(forecast: ThirtyDayForecastResponse) -> Dict[str, Any]:
+    """A thirty-day forecast with its predictions as one array per field"""
+    predictions = forecast.predictions
+    fields = [name for name in DailyPrediction.model_fields if name != 'date']
+    return {
+        "location": forecast.location,
+        "predictions": {
+            "start": predictions[0].date,
+            "step_days": 1,
+            "count": len(predictions),
+            **{field: [getattr(p, field) for p in predictions] for field in fields}
+        },
+        "summary": forecast.summary,
+        "ensemble": forecast.ensemble.model_dump() if forecast.ensemble else None
+    }
+
+@app.post("/thirty-day-forecast", response_model=ThirtyDayForecastResponse)
+async def thirty_day_forecast(request: ThirtyDayForecastRequest, accept: Optional[str] = Header(None),
+                              accept_encoding: Optional[str] = Header(None)):
+    """
+    Generate 30-day weather forecast with AI-based rainfall predictions.
+    This combines historical data patterns with current conditions.
     """
-    Generate weather forecast using historical NASA POWER data
+    media_type = negotiate_media_type(accept, THIRTY_DAY_MEDIA_TYPES)
+    response = await compute_thirty_day_forecast(request)
+    with stage("serialize"):
+        if media_type == COLUMNAR_JSON_MEDIA_TYPE:
+            body = json.dumps(thirty_day_columns(response), separators=(",", ":")).encode()
+        elif media_type == MSGPACK_MEDIA_TYPE:
+            body = pack_msgpack(thirty_day_columns(response))
+        else:
+            body = response.model_dump_json().encode()
+        return encoded_response(body, media_type, negotiate_encoding(accept_encoding))
+
+async def stream_thirty_day_batch(locations: List[ThirtyDayForecastRequest], encoding: Optional[str]) -> StreamingResponse:
+    """Stream one NDJSON line per location, in the order the forecasts complete"""
+    async def indexed(index: int, location: ThirtyDayForecastRequest) -> str:
+        try:
+            forecast = await compute_thirty_day_forecast(location)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            return json.dumps({"index": index, "error": detail})
+        return f'{{"index": {index}, "forecast": {forecast.model_dump_json()}}}'
+    
+    async def lines():
+        yield json.dumps({"locations": len(locations)}) + "\n"
+        tasks = [asyncio.ensure_future(indexed(i, location)) for i, location in enumerate(locations)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done + "\n"
+        finally:
+            # Client went away mid-stream: don't keep computing forecasts nobody will read
+            for task in tasks:
+                task.cancel()
+    
+    return streaming_response(lines(), encoding)
+
+@app.post("/thirty-day-forecast/batch", response_model=MultiLocationForecastResponse)
+async def thirty_day_forecast_batch(request: MultiLocationForecastRequest, accept: Optional[str] = Header(None),
+                                    accept_encoding: Optional[str] = Header(None)):
     """
+    Generate 30-day forecasts for many locations in one call.
+    Histories are fetched concurrently; a failing location doesn't fail the others.
+    With "Accept: application/x-ndjson", each location is streamed as soon as it is ready.
+    """
+    if len(request.locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_BATCH_LOCATIONS} locations per request"
+        )
+    
+    encoding = negotiate_encoding(accept_encoding)
+    if negotiate_media_type(accept, BATCH_MEDIA_TYPES) == NDJSON_MEDIA_TYPE:
+        return await stream_thirty_day_batch(request.locations, encoding)
+    
+    results = await asyncio.gather(
+        *(compute_thirty_day_forecast(location) for location in request.locations),
+        return_exceptions=True
+    )
+    
+    forecasts = []
+    errors = []
+    for index, result in enumerate(results):
+        if isinstance(result, BaseException):
+            detail = result.detail if isinstance(result, HTTPException) else str(result)
+            errors.append({"index": index, "detail": detail})
+            forecasts.append(None)
+        else:
+            forecasts.append(result)
+    
+    with stage("serialize"):
+        response = MultiLocationForecastResponse(forecasts=forecasts, errors=errors)
+        return encoded_response(response.model_dump_json().encode(), JSON_MEDIA_TYPE, encoding)
+
+# Event-date ranking: default penalty weights, history used for non-indexed locations and the grid size limits.
+# Every grid cell outside the climatology index costs a history fetch and a fit, so those are capped
+# separately; dates add no fetches or fits.
+EVENT_PENALTY_WEIGHTS = {"rain": 0.4, "heat": 0.2, "cold": 0.2, "wind": 0.2}
+EVENT_HISTORY_YEARS = 3
+MAX_RANKING_COMBINATIONS = int(os.getenv("MAX_RANKING_COMBINATIONS", "20000"))
+MAX_RANKING_CELLS = int(os.getenv("MAX_RANKING_CELLS", str(MAX_BATCH_LOCATIONS)))
+RANKING_FETCH_CONCURRENCY = int(os.getenv("RANKING_FETCH_CONCURRENCY", "4"))
+
+def parse_event_dates(dates: List[str]) -> pd.DatetimeIndex:
     try:
-        # Fetch historical data
-        df = fetch_nasa_power_data(
-            request.latitude,
-            request.longitude,
-            request.start_date,
-            request.end_date
+        return pd.DatetimeIndex([pd.Timestamp(d) for d in dates]).normalize()
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid date: {e}")
+
+async def event_conditions(lat: float, lon: float, dates: pd.DatetimeIndex, engine: str,
+                           fetch_slots: asyncio.Semaphore, fit_slots: asyncio.Semaphore) -> Dict[str, Any]:
+    """
+    Expected temperature, wind speed and rain-day frequency at one location on
+    each date. Indexed locations use the climatology index normals; others the
+    engine's temperature forecast plus day-of-year statistics of recent history.
+    The fetch and the fit each wait for one of `fetch_slots` and `fit_slots`,
+    which the caller shares between its cells.
+    """
+    slots = calendar_slot(dates)
+    temp_col, wind_col, rain_col = (
+        INDEX_STATS.index(name) for name in ("temperature_mean", "windspeed_mean", "rain_day_frequency")
+    )
+    
+    stats = climatology_index.cell_statistics(lat, lon) if climatology_index is not None else None
+    if stats is not None:
+        temperature = stats[slots, temp_col].astype(float)
+    else:
+        end_date = datetime.now()
+        start_str = datetime(end_date.year - EVENT_HISTORY_YEARS, 1, 1).strftime('%Y%m%d')
+        end_str = end_date.strftime('%Y%m%d')
+        async with fetch_slots:
+            with stage("fetch"):
+                df = await fetch_nasa_power_data(lat, lon, start_str, end_str)
+        if df.empty:
+            raise HTTPException(status_code=404, detail="No historical data available")
+        
+        stats = daily_statistics(df)
+        async with fit_slots:
+            with stage("fit"):
+                series = await get_forecast_series(df, lat, lon, start_str, end_str, engine, 'temperature')
+        
+        # Dates inside the forecast horizon take the forecast, the rest fall back to the seasonal mean
+        forecast = np.array([f['value'] for f in series], dtype=float)
+        offsets = (dates.values.astype('datetime64[D]') - np.datetime64(series[0]['date'][:10])).astype(int)
+        inside = (offsets >= 0) & (offsets < len(forecast))
+        temperature = np.where(inside, forecast[np.clip(offsets, 0, len(forecast) - 1)], stats[slots, temp_col])
+    
+    return {
+        "temperature": temperature,
+        "windspeed": stats[slots, wind_col].astype(float),
+        "rain_day_frequency": stats[slots, rain_col].astype(float),
+        "reference_temperature": float(np.nanmean(stats[:, temp_col]))
+    }
+
+def score_event_conditions(temperature: np.ndarray, windspeed: np.ndarray, rain_day_frequency: np.ndarray,
+                           reference_temperature: np.ndarray,
+                           weights: Dict[str, float]) -> Tuple[np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+    """
+    Suitability score (0-100) for outdoor events over arrays of any shape,
+    with the per-factor penalties (0-1) it was built from and predict_rainfall's
+    rain probability. Thresholds follow generate_recommendations; the rain
+    penalty blends that probability with how often it has actually rained on
+    that day of the year.
+    """
+    humidity = np.clip(70 - (temperature - reference_temperature) * 1.5, 30, 95)
+    model_rain = predict_rainfall_batch(temperature, humidity, np.full(temperature.shape, 1013.0))
+    penalties = {
+        "rain": 0.5 * model_rain["rainfall_probability"] + 0.5 * np.nan_to_num(rain_day_frequency),
+        "heat": np.clip((temperature - 25) / 10, 0, 1),  # 0.5 at 30 °C, 1 at 35 °C
+        "cold": np.clip((15 - temperature) / 10, 0, 1),  # 0.5 at 10 °C, 1 at 5 °C
+        "wind": np.clip((windspeed - 4) / 6, 0, 1)  # 1 at 10 m/s
+    }
+    total_penalty = sum(weight * penalties[name] for name, weight in weights.items())
+    score = 100 * (1 - total_penalty / sum(weights.values()))
+    return score, penalties, model_rain["rainfall_probability"]
+
+@app.post("/rank-event-dates", response_model=EventRankingResponse)
+async def rank_event_dates(request: EventRankingRequest):
+    """
+    Rank candidate locations x dates for an outdoor event and return the best top_k.
+    Each grid cell is fetched and fitted once however many candidates and dates
+    share it, and the whole grid is scored in one vectorized pass.
+    """
+    combinations = len(request.locations) * len(request.dates)
+    if combinations > MAX_RANKING_COMBINATIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_RANKING_COMBINATIONS} location x date combinations per request"
+        )
+    if request.top_k < 1:
+        raise HTTPException(status_code=422, detail="top_k must be at least 1")
+    weights = {**EVENT_PENALTY_WEIGHTS, **(request.weights or {})}
+    if set(weights) != set(EVENT_PENALTY_WEIGHTS) or min(weights.values()) < 0 or sum(weights.values()) <= 0:
+        raise HTTPException(
+            status_code=422,
+            detail=f"weights must be non-negative, not all zero, with keys from {', '.join(EVENT_PENALTY_WEIGHTS)}"
+        )
+    
+    try:
+        engine = resolve_engine(request.model)
+        dates = parse_event_dates(request.dates)
+        if not request.locations or not len(dates):
+            return EventRankingResponse(evaluated=0, options=[], errors=[])
+        
+        # Candidates in the same grid cell share one set of conditions
+        cells: Dict[Tuple[float, float], List[int]] = {}
+        for index, location in enumerate(request.locations):
+            cell = resolve_location(location.latitude, location.longitude, request.snap_to_grid)
+            cells.setdefault(cell, []).append(index)
+        fetched_cells = sum(
+            1 for lat, lon in cells if climatology_index is None or climatology_index.cell(lat, lon) is None
+        )
+        if fetched_cells > MAX_RANKING_CELLS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"At most {MAX_RANKING_CELLS} grid cells outside the climatology index per request "
+                       f"({fetched_cells} requested); rank more dates per location instead"
+            )
+        
+        # At most RANKING_FETCH_CONCURRENCY histories are fetched and one fit per pool worker is in
+        # flight at a time, so a large grid queues instead of flooding NASA or overflowing the pool
+        fetch_slots = asyncio.Semaphore(RANKING_FETCH_CONCURRENCY)
+        fit_slots = asyncio.Semaphore(fit_pool.workers if fit_pool is not None else 1)
+        results = await asyncio.gather(
+            *(event_conditions(lat, lon, dates, engine, fetch_slots, fit_slots) for lat, lon in cells),
+            return_exceptions=True
+        )
+        
+        rows: List[int] = []
+        conditions: List[Dict[str, Any]] = []
+        errors = []
+        for indexes, result in zip(cells.values(), results):
+            if isinstance(result, BaseException):
+                detail = result.detail if isinstance(result, HTTPException) else str(result)
+                errors.extend({"index": index, "detail": detail} for index in indexes)
+                continue
+            rows.extend(indexes)
+            conditions.extend([result] * len(indexes))
+        
+        if not rows:
+            return EventRankingResponse(evaluated=0, options=[], errors=sorted(errors, key=lambda e: e["index"]))
+        
+        with stage("score"):
+            # (candidates, dates) grids
+            temperature = np.stack([c["temperature"] for c in conditions])
+            windspeed = np.stack([c["windspeed"] for c in conditions])
+            rain_days = np.stack([c["rain_day_frequency"] for c in conditions])
+            reference = np.array([[c["reference_temperature"]] for c in conditions])
+            score, penalties, rain_probability = score_event_conditions(
+                temperature, windspeed, rain_days, reference, weights
+            )
+            
+            # Partial sort: only cells scoring at least the k-th best are ordered, however
+            # large the grid. Ties go to the earlier location in the request, then the
+            # earlier date, so the cut at top_k doesn't depend on how cells were grouped.
+            flat = np.where(np.isnan(score), -np.inf, score).ravel()
+            k = min(request.top_k, flat.size)
+            kth = np.partition(flat, flat.size - k)[flat.size - k]
+            candidates = np.flatnonzero(flat >= kth)
+            candidate_rows, candidate_cols = np.divmod(candidates, len(dates))
+            order = np.lexsort((candidate_cols, np.asarray(rows)[candidate_rows], -flat[candidates]))
+            top = candidates[order][:k]
+        
+        date_labels = dates.strftime('%Y-%m-%d')
+        options = []
+        for position in top.tolist():
+            row, col = divmod(position, len(dates))
+            location = request.locations[rows[row]]
+            options.append(RankedEventOption(
+                location_index=rows[row],
+                name=location.name,
+                latitude=location.latitude,
+                longitude=location.longitude,
+                date=date_labels[col],
+                score=round(float(score[row, col]), 1),
+                temperature=round(float(temperature[row, col]), 1),
+                wind_speed=round(float(windspeed[row, col]), 1),
+                rainfall_probability=round(float(rain_probability[row, col]), 3),
+                penalties={name: round(float(p[row, col]), 3) for name, p in penalties.items()}
+            ))
+        
+        return EventRankingResponse(
+            evaluated=int(score.size),
+            options=options,
+            errors=sorted(errors, key=lambda e: e["index"])
         )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Event ranking failed: {str(e)}")
+
+async def forecast_response(request: ForecastRequest, accept: Optional[str], accept_encoding: Optional[str],
+                            if_none_match: Optional[str]) -> Response:
+    """Forecast in the negotiated format, or 304 when if_none_match matches its ETag"""
+    try:
+        lat, lon = resolve_location(request.latitude, request.longitude, request.snap_to_grid)
+        engine = resolve_engine(request.model)
+        variables = resolve_variables(request.variables)
+        for variable in variables:
+            hot_locations.record(("forecast", lat, lon, request.start_date, request.end_date, engine, variable))
+        media_type = negotiate_media_type(accept, FORECAST_MEDIA_TYPES)
+        encoding = negotiate_encoding(accept_encoding)
+        
+        # Fetch historical data
+        with stage("fetch"):
+            df = await fetch_nasa_power_data(
+                lat,
+                lon,
+                request.start_date,
+                request.end_date
+            )
         
         if df.empty:
             raise HTTPException(status_code=404, detail="No data available for specified location/dates")
         
         # Train models and generate forecasts
-        if USE_PROPHET:
-            temp_forecast = train_prophet_model(df, 'temperature')
-            model_name = "Prophet"
-        else:
-            temp_forecast = train_arima_model(df, 'temperature')
-            model_name = "ARIMA"
-        
-        # Calculate summary statistics
-        summary_stats = {
-            "historical_avg_temp": float(df['temperature'].mean()),
-            "historical_max_temp": float(df['temperature'].max()),
-            "historical_min_temp": float(df['temperature'].min()),
-            "historical_avg_rainfall": float(df['rainfall'].mean()),
-            "historical_total_rainfall": float(df['rainfall'].sum()),
-            "historical_avg_windspeed": float(df['windspeed'].mean()),
-            "forecast_avg_temp": float(sum(f['value'] for f in temp_forecast[:90]) / 90),  # 3-month avg
-            "forecast_max_temp": float(max(f['upper'] for f in temp_forecast)),
-            "forecast_min_temp": float(min(f['lower'] for f in temp_forecast))
-        }
-        
-        # Generate recommendations
-        recommendations = generate_recommendations(df, temp_forecast)
+        model_name = MODEL_ENGINES[engine].name
+        with stage("fit"):
+            # Each variable is its own fit; pooled engines run them on separate workers
+            fitted = await asyncio.gather(*(
+                get_forecast_series(df, lat, lon, request.start_date, request.end_date, engine, variable)
+                for variable in variables
+            ))
+            series = dict(zip(variables, fitted))
+            temp_forecast = series['temperature']
         
-        # Format forecast data points (limit to requested months)
+        # Calculate date ranges (forecast limited to requested months)
         days_to_return = request.forecast_months * 30
-        forecast_points = [
-            ForecastDataPoint(
-                date=f['date'],
-                temperature=f['value'],
-                temperature_lower=f.get('lower'),
-                temperature_upper=f.get('upper')
-            )
-            for f in temp_forecast[:days_to_return]
-        ]
+        extra_values = extra_variable_values(series, days_to_return)
+        
+        with stage("summary"):
+            # Calculate summary statistics
+            summary_stats = {
+                "historical_avg_temp": float(df['temperature'].mean()),
+                "historical_max_temp": float(df['temperature'].max()),
+                "historical_min_temp": float(df['temperature'].min()),
+                "historical_avg_rainfall": float(df['rainfall'].mean()),
+                "historical_total_rainfall": float(df['rainfall'].sum()),
+                "historical_avg_windspeed": float(df['windspeed'].mean()),
+                "forecast_avg_temp": float(sum(f['value'] for f in temp_forecast[:90]) / 90),  # 3-month avg
+                "forecast_max_temp": float(max(f['upper'] for f in temp_forecast)),
+                "forecast_min_temp": float(min(f['lower'] for f in temp_forecast))
+            }
+            if "rainfall" in series:
+                rain = np.maximum([f['value'] for f in series['rainfall'][:90]], 0.0)
+                summary_stats["forecast_avg_rainfall"] = float(rain.mean())  # 3-month avg
+                summary_stats["forecast_total_rainfall"] = float(rain.sum())
+            if "windspeed" in series:
+                wind = np.maximum([f['value'] for f in series['windspeed'][:90]], 0.0)
+                summary_stats["forecast_avg_windspeed"] = float(wind.mean())
+            
+            # Generate recommendations, against seasonal normals when the location is indexed
+            normals = climatology_index.window(
+                lat, lon, df['date'].max() + timedelta(days=1), 90
+            ) if climatology_index is not None else None
+            recommendations = generate_recommendations(df, temp_forecast, normals)
         
-        # Calculate date ranges
         start_dt = datetime.strptime(request.start_date, '%Y%m%d')
         end_dt = datetime.strptime(request.end_date, '%Y%m%d')
         forecast_start = df['date'].max() + timedelta(days=1)
         forecast_end = forecast_start + timedelta(days=days_to_return - 1)
         
-        return ForecastResponse(
-            location={
+        metadata = {
+            "location": {
                 "latitude": request.latitude,
-                "longitude": request.longitude
+                "longitude": request.longitude,
+                "grid_latitude": lat,
+                "grid_longitude": lon
             },
-            historical_period={
+            "historical_period": {
                 "start": start_dt.isoformat(),
                 "end": end_dt.isoformat()
             },
-            forecast_period={
+            "forecast_period": {
                 "start": forecast_start.isoformat(),
                 "end": forecast_end.isoformat()
             },
-            summary_stats=summary_stats,
-            forecasts=forecast_points,
-            recommendations=recommendations,
-            model_used=model_name
+            "summary_stats": summary_stats,
+            "recommendations": recommendations,
+            "model_used": model_name
+        }
+        
+        points = temp_forecast[:days_to_return]
+        if media_type == NDJSON_MEDIA_TYPE:
+            return stream_ndjson(
+                {**metadata, "forecast_points": len(points)},
+                (
+                    {
+                        "date": f['date'],
+                        "temperature": f['value'],
+                        "temperature_lower": f.get('lower'),
+                        "temperature_upper": f.get('upper'),
+                        **{variable: values[i] for variable, values in extra_values.items()}
+                    }
+                    for i, f in enumerate(points)
+                ),
+                encoding
+            )
+        
+        # The same history and fit always give the same response, so clients can revalidate
+        # with If-None-Match instead of downloading it again
+        cache_key = forecast_cache_key(lat, lon, request.start_date, request.end_date, engine, 'temperature')
+        etag = make_etag(
+            media_type, encoding, cache_key, tuple(variables), days_to_return, metadata, points, extra_values
         )
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        fitted_times = [
+            forecast_cache.stored_at(
+                forecast_cache_key(lat, lon, request.start_date, request.end_date, engine, variable)
+            )
+            for variable in variables
+        ] if forecast_cache else []
+        fitted_at = max((t for t in fitted_times if t is not None), default=None)
+        if fitted_at is not None:
+            cache_headers["Last-Modified"] = http_date(fitted_at)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={**VARY_HEADERS, **cache_headers})
+        
+        if media_type == JSON_MEDIA_TYPE:
+            # Format forecast data points
+            with stage("build_points"):
+                forecast_points = [
+                    ForecastDataPoint(
+                        date=f['date'],
+                        temperature=f['value'],
+                        temperature_lower=f.get('lower'),
+                        temperature_upper=f.get('upper'),
+                        rainfall=extra_values['rainfall'][i] if 'rainfall' in extra_values else None,
+                        windspeed=extra_values['windspeed'][i] if 'windspeed' in extra_values else None
+                    )
+                    for i, f in enumerate(points)
+                ]
+        
+        with stage("serialize"):
+            if media_type == COLUMNAR_JSON_MEDIA_TYPE:
+                columnar = {**metadata, "forecasts": forecast_columns(points, digits=2, extra=extra_values)}
+                body = json.dumps(columnar, separators=(",", ":")).encode()
+            elif media_type == MSGPACK_MEDIA_TYPE:
+                body = pack_msgpack({**metadata, "forecasts": forecast_columns(points, extra=extra_values)})
+            else:
+                body = ForecastResponse(**metadata, forecasts=forecast_points).model_dump_json().encode()
+            return encoded_response(body, media_type, encoding, cache_headers)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Forecast generation failed: {str(e)}")
 
+@app.post("/forecast", response_model=ForecastResponse)
+async def generate_forecast(request: ForecastRequest, accept: Optional[str] = Header(None),
+                            accept_encoding: Optional[str] = Header(None),
+                            if_none_match: Optional[str] = Header(None)):
+    """
+    Generate weather forecast using historical NASA POWER data.
+    With "Accept: application/x-ndjson", the response is streamed as a header
+    line (everything except forecasts) followed by one line per forecast point.
+    Rainfall and wind speed are forecast too when listed in `variables`, all
+    from the same fetched history and fitted concurrently.
+    """
+    return await forecast_response(request, accept, accept_encoding, if_none_match)
+
+@app.get("/forecast", response_model=ForecastResponse)
+async def get_forecast(latitude: float, longitude: float, start_date: str, end_date: str,
+                       forecast_months: int = 12, snap_to_grid: Optional[bool] = None,
+                       model: Optional[str] = None, variables: Optional[str] = None,
+                       accept: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None),
+                       if_none_match: Optional[str] = Header(None)):
+    """
+    POST /forecast with the request fields as query parameters and `variables`
+    comma-separated. Browsers and HTTP caches revalidate GET responses with
+    If-None-Match on their own, so this is the form the ETag is meant for.
+    """
+    request = ForecastRequest(
+        latitude=latitude,
+        longitude=longitude,
+        start_date=start_date,
+        end_date=end_date,
+        forecast_months=forecast_months,
+        snap_to_grid=snap_to_grid,
+        model=model,
+        variables=[v.strip() for v in variables.split(",") if v.strip()] if variables else None
+    )
+    return await forecast_response(request, accept, accept_encoding, if_none_match)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
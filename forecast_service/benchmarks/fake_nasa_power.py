@@ -0,0 +1,126 @@
+"""
+Local stand-in for the NASA POWER daily point API, for benchmarking.
+
+Serves /api/temporal/daily/point with either synthetic data (deterministic
+per location) or a recorded NASA response, with configurable latency and
+failure injection.
+
+    python fake_nasa_power.py --port 8100 --latency-ms 300 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import FastAPI, Query, Response
+from fastapi.responses import JSONResponse
+
+PARAMETERS = ["T2M", "PRECTOTCORR", "WS2M"]
+
+
+def synthetic_series(lat: float, lon: float, start: datetime, end: datetime) -> Dict[str, Dict[str, float]]:
+    """Seasonal series with noise, reproducible for a given location"""
+    days = (end - start).days + 1
+    dates = [start + timedelta(days=i) for i in range(days)]
+    day_of_year = np.array([d.timetuple().tm_yday for d in dates])
+    rng = np.random.default_rng(abs(hash((round(lat, 3), round(lon, 3)))) % 2**32)
+
+    hemisphere = 1 if lat >= 0 else -1
+    base_temp = 25 - abs(lat) * 0.35
+    temperature = base_temp + hemisphere * 8 * np.sin(2 * np.pi * (day_of_year - 105) / 365) + rng.normal(0, 2, days)
+    rainfall = np.maximum(0, rng.gamma(0.6, 4, days) - 1)
+    windspeed = np.maximum(0, 3 + rng.normal(0, 1.2, days))
+
+    keys = [d.strftime('%Y%m%d') for d in dates]
+    return {
+        "T2M": dict(zip(keys, np.round(temperature, 2).tolist())),
+        "PRECTOTCORR": dict(zip(keys, np.round(rainfall, 2).tolist())),
+        "WS2M": dict(zip(keys, np.round(windspeed, 2).tolist())),
+    }
+
+
+def recorded_series(recorded: Dict[str, Any], start: datetime, end: datetime) -> Dict[str, Dict[str, float]]:
+    """Subset of a recorded NASA response covering [start, end]; missing days get the fill value"""
+    source = recorded["properties"]["parameter"]
+    keys = [(start + timedelta(days=i)).strftime('%Y%m%d') for i in range((end - start).days + 1)]
+    return {
+        name: {key: source.get(name, {}).get(key, -999.0) for key in keys}
+        for name in PARAMETERS
+    }
+
+
+def create_app(latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0,
+               hang_rate: float = 0, hang_seconds: float = 60, recorded_path: Optional[str] = None) -> FastAPI:
+    app = FastAPI(title="Fake NASA POWER")
+    recorded = None
+    if recorded_path:
+        with open(recorded_path) as f:
+            recorded = json.load(f)
+    stats = {"requests": 0, "failures": 0, "hangs": 0}
+
+    @app.get("/api/temporal/daily/point")
+    async def daily_point(
+        latitude: float,
+        longitude: float,
+        start: str,
+        end: str,
+        parameters: str = Query("T2M,PRECTOTCORR,WS2M"),
+    ):
+        stats["requests"] += 1
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+
+        roll = random.random()
+        if roll < failure_rate:
+            stats["failures"] += 1
+            return Response(status_code=503)
+        if roll < failure_rate + hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(hang_seconds)
+
+        start_dt = datetime.strptime(start, '%Y%m%d')
+        end_dt = datetime.strptime(end, '%Y%m%d')
+        if recorded is not None:
+            series = recorded_series(recorded, start_dt, end_dt)
+        else:
+            series = synthetic_series(latitude, longitude, start_dt, end_dt)
+
+        wanted = [p for p in parameters.split(",") if p in series]
+        return JSONResponse({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+            "properties": {"parameter": {name: series[name] for name in wanted}},
+        })
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0, help="added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="uniform +/- jitter on the latency")
+    parser.add_argument("--failure-rate", type=float, default=0, help="fraction of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0, help="fraction of requests that stall for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=60)
+    parser.add_argument("--recorded", help="serve this recorded NASA POWER JSON response instead of synthetic data")
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(
+        create_app(args.latency_ms, args.jitter_ms, args.failure_rate, args.hang_rate, args.hang_seconds, args.recorded),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
+
+
+if __name__ == "__main__":
+    main()
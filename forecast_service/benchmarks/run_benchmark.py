@@ -0,0 +1,308 @@
+"""
+Benchmark the forecast service against a local NASA POWER stand-in.
+
+Starts fake_nasa_power.py and the service (uvicorn app:app) as subprocesses,
+drives each endpoint at a fixed concurrency and writes latency percentiles,
+throughput and peak memory per endpoint and engine as JSON.
+
+    python run_benchmark.py --requests 50 --concurrency 8 --engines climatology,prophet \\
+        --fake-latency-ms 300 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCH_DIR)
+
+
+def _tree_pids(pid: int) -> List[int]:
+    """pid plus all of its descendants (Linux /proc only)"""
+    pids = [pid]
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                for child in f.read().split():
+                    pids.extend(_tree_pids(int(child)))
+    except OSError:
+        pass
+    return pids
+
+
+def tree_rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process tree, or None where /proc isn't available"""
+    total = 0
+    for p in _tree_pids(pid):
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            if p == pid:
+                return None
+    return total
+
+
+class MemorySampler:
+    """Samples the service's process-tree RSS in the background and keeps the peak"""
+
+    def __init__(self, pid: int, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            rss = tree_rss_bytes(self.pid)
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def percentile_summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "mean": round(float(values.mean()), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, service_pid: int, endpoint: str, engine: Optional[str],
+                       make_payload: Callable[[int], Dict[str, Any]], requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=make_payload(i))
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == "200":
+                latencies.append(elapsed)
+
+    with MemorySampler(service_pid) as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "engine": engine,
+        "requests": requests,
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "errors": requests - len(latencies),
+        "status_counts": statuses,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall > 0 else None,
+        "latency_ms": percentile_summary(latencies),
+        "peak_rss_mb": round(sampler.peak / 2**20, 1) if sampler.peak is not None else None,
+    }
+
+
+def location_pool(count: int, seed: int) -> List[Dict[str, float]]:
+    """Distinct locations on separate NASA grid cells, so caches only hit when locations repeat"""
+    rng = random.Random(seed)
+    cells = set()
+    while len(cells) < count:
+        cells.add((rng.randint(-100, 100) * 0.5, rng.randint(-250, 250) * 0.625))
+    return [{"latitude": lat, "longitude": lon} for lat, lon in sorted(cells)]
+
+
+def wait_for(url: str, timeout: float, expect_status: int = 200) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code == expect_status:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def start_process(args: List[str], env: Dict[str, str], cwd: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable] + args, cwd=cwd, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def run_benchmarks(args, service_pid: int, service_url: str) -> List[Dict[str, Any]]:
+    locations = location_pool(args.locations or args.requests, args.seed)
+    rng = random.Random(args.seed)
+    rainfall_inputs = [
+        {"temperature": rng.uniform(-5, 40), "humidity": rng.uniform(10, 100), "pressure": rng.uniform(980, 1040)}
+        for _ in range(args.requests)
+    ]
+    end = datetime(2024, 12, 31)
+    start = end.replace(year=end.year - args.history_years + 1, month=1, day=1)
+
+    results = []
+    async with httpx.AsyncClient(base_url=service_url, timeout=args.request_timeout,
+                                 limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        endpoints = args.endpoints.split(",")
+        if "predict-rainfall" in endpoints:
+            results.append(await run_scenario(
+                client, service_pid, "/predict-rainfall", None,
+                lambda i: rainfall_inputs[i], args.requests, args.concurrency
+            ))
+        if "thirty-day-forecast" in endpoints:
+            results.append(await run_scenario(
+                client, service_pid, "/thirty-day-forecast", None,
+                lambda i: locations[i % len(locations)], args.requests, args.concurrency
+            ))
+        if "forecast" in endpoints:
+            for engine in args.engines.split(","):
+                results.append(await run_scenario(
+                    client, service_pid, "/forecast", engine,
+                    lambda i, engine=engine: {
+                        **locations[i % len(locations)],
+                        "start_date": start.strftime('%Y%m%d'),
+                        "end_date": end.strftime('%Y%m%d'),
+                        "model": engine,
+                    },
+                    args.requests, args.concurrency
+                ))
+    return results
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'endpoint':<22}{'engine':<13}{'ok/total':>10}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak MB':>9}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        lat = r["latency_ms"]
+        print(
+            f"{r['endpoint']:<22}{(r['engine'] or '-'):<13}{r['succeeded']:>5}/{r['requests']:<4}"
+            f"{_fmt(r['throughput_rps']):>9}{_fmt(lat['p50']):>10}{_fmt(lat['p95']):>10}{_fmt(lat['p99']):>10}"
+            f"{_fmt(r['peak_rss_mb']):>9}",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="requests per endpoint/engine")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", default="predict-rainfall,thirty-day-forecast,forecast")
+    parser.add_argument("--engines", default="climatology,arima,prophet", help="engines to benchmark on /forecast")
+    parser.add_argument("--locations", type=int, default=0,
+                        help="distinct locations to cycle through (default: one per request, i.e. cold caches)")
+    parser.add_argument("--history-years", type=int, default=3, help="years of history requested by /forecast")
+    parser.add_argument("--fake-latency-ms", type=float, default=200)
+    parser.add_argument("--fake-jitter-ms", type=float, default=50)
+    parser.add_argument("--fake-failure-rate", type=float, default=0)
+    parser.add_argument("--fake-hang-rate", type=float, default=0)
+    parser.add_argument("--recorded", help="recorded NASA POWER JSON for the fake server to serve")
+    parser.add_argument("--service-port", type=int, default=8200)
+    parser.add_argument("--fake-port", type=int, default=8100)
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+    parser.add_argument("--service-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the service, e.g. FIT_WORKERS=4 (repeatable)")
+    args = parser.parse_args()
+
+    fake_args = [
+        os.path.join(BENCH_DIR, "fake_nasa_power.py"),
+        "--port", str(args.fake_port),
+        "--latency-ms", str(args.fake_latency_ms),
+        "--jitter-ms", str(args.fake_jitter_ms),
+        "--failure-rate", str(args.fake_failure_rate),
+        "--hang-rate", str(args.fake_hang_rate),
+    ]
+    if args.recorded:
+        fake_args += ["--recorded", os.path.abspath(args.recorded)]
+
+    cache_dir = tempfile.mkdtemp(prefix="nasa-bench-")
+    service_env = {
+        **os.environ,
+        "NASA_POWER_URL": f"http://127.0.0.1:{args.fake_port}/api/temporal/daily/point",
+        "NASA_CACHE_DIR": cache_dir,
+        "MODEL_CACHE_DIR": "",
+        "WARMUP_MODELS": args.engines,
+    }
+    for item in args.service_env:
+        key, _, value = item.partition("=")
+        service_env[key] = value
+
+    service_url = f"http://127.0.0.1:{args.service_port}"
+    fake = start_process(fake_args, dict(os.environ), BENCH_DIR)
+    service = start_process(
+        ["-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(args.service_port), "--log-level", "warning"],
+        service_env, SERVICE_DIR
+    )
+    try:
+        wait_for(f"http://127.0.0.1:{args.fake_port}/stats", args.startup_timeout)
+        started = time.perf_counter()
+        wait_for(f"{service_url}/health", args.startup_timeout)
+        startup_seconds = time.perf_counter() - started
+
+        results = asyncio.run(run_benchmarks(args, service.pid, service_url))
+        fake_stats = httpx.get(f"http://127.0.0.1:{args.fake_port}/stats").json()
+    finally:
+        service.terminate()
+        fake.terminate()
+        service.wait(timeout=30)
+        fake.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "service_ready_seconds": round(startup_seconds, 3),
+            "fake_nasa": fake_stats,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    print_table(results)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Day-of-year climatology for a region of NASA POWER grid cells.
+
+The index holds, per grid cell and calendar day, the mean and variance of
+temperature, rainfall and wind speed plus the frequency of rain days. It is
+stored as a plain .npy array that servers open memory-mapped and read-only,
+so every process shares one copy through the page cache and a lookup only
+touches the pages it reads.
+
+Build it offline from long NASA POWER history:
+
+    python climatology_index.py --lat-min -35 --lat-max -22 --lon-min 16 --lon-max 33 \\
+        --start-year 1995 --end-year 2024 --output .cache/climatology
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from nasa_cache import NASA_FILL_VALUE
+from nasa_client import POWER_PARAMETERS, NasaPowerClient, parse_daily_point
+from nasa_grid import GRID_LAT_STEP, GRID_LON_STEP, snap_to_grid
+
+# Statistics stored per cell and calendar day, in this order along the last axis
+INDEX_STATS = [
+    "temperature_mean", "temperature_var",
+    "rainfall_mean", "rainfall_var",
+    "windspeed_mean", "windspeed_var",
+    "rain_day_frequency",
+]
+# Days with at least this much precipitation (mm) count as rain days
+RAIN_DAY_MM = 1.0
+# Neighbouring calendar days pooled on each side, so a few decades give stable daily statistics
+SMOOTHING_HALF_WINDOW = 7
+CALENDAR_DAYS = 365
+
+ARRAY_FILE = "climatology.npy"
+META_FILE = "climatology.json"
+
+
+def calendar_slot(dates) -> np.ndarray:
+    """0-based day in a 365-day calendar; February 29 shares February 28's slot"""
+    index = pd.DatetimeIndex(dates)
+    slot = index.dayofyear.to_numpy() - 1
+    return slot - (index.is_leap_year & (slot >= 59))
+
+
+def _circular_window_sum(values: np.ndarray) -> np.ndarray:
+    """Sum over +/- SMOOTHING_HALF_WINDOW days, wrapping around the year end"""
+    h = SMOOTHING_HALF_WINDOW
+    padded = np.concatenate([values[-h:], values, values[:h]])
+    cumulative = np.concatenate([[0.0], np.cumsum(padded)])
+    return cumulative[2 * h + 1:] - cumulative[:-(2 * h + 1)]
+
+
+def daily_statistics(df: pd.DataFrame) -> np.ndarray:
+    """(CALENDAR_DAYS, len(INDEX_STATS)) statistics from a daily history frame; fill values are ignored"""
+    slots = calendar_slot(df['date'])
+    stats = np.empty((CALENDAR_DAYS, len(INDEX_STATS)), dtype=np.float32)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k, column in enumerate(['temperature', 'rainfall', 'windspeed']):
+            values = df[column].to_numpy(dtype=float)
+            valid = np.isfinite(values) & (values != NASA_FILL_VALUE)
+            count = _circular_window_sum(np.bincount(slots[valid], minlength=CALENDAR_DAYS).astype(float))
+            total = _circular_window_sum(np.bincount(slots[valid], weights=values[valid], minlength=CALENDAR_DAYS))
+            squares = _circular_window_sum(np.bincount(slots[valid], weights=values[valid] ** 2, minlength=CALENDAR_DAYS))
+            mean = total / count
+            stats[:, 2 * k] = mean
+            stats[:, 2 * k + 1] = np.maximum(squares / count - mean ** 2, 0.0)
+
+            if column == 'rainfall':
+                rain_days = (values[valid] >= RAIN_DAY_MM).astype(float)
+                stats[:, 6] = _circular_window_sum(
+                    np.bincount(slots[valid], weights=rain_days, minlength=CALENDAR_DAYS)
+                ) / count
+    return stats
+
+
+class ClimatologyIndex:
+    """Read-only, memory-mapped view of a built climatology index"""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.values = np.load(os.path.join(path, ARRAY_FILE), mmap_mode='r')
+        self.stats = {name: k for k, name in enumerate(self.meta['stats'])}
+        self._lat_origin = round(self.meta['lat_min'] / GRID_LAT_STEP)
+        self._lon_origin = round(self.meta['lon_min'] / GRID_LON_STEP)
+
+    def cell(self, lat: float, lon: float) -> Optional[Tuple[int, int]]:
+        """Array position of the grid cell containing a point, or None if it isn't indexed"""
+        grid_lat, grid_lon = snap_to_grid(lat, lon)
+        i = round(grid_lat / GRID_LAT_STEP) - self._lat_origin
+        j = round(grid_lon / GRID_LON_STEP) - self._lon_origin
+        n_lat, n_lon = self.values.shape[:2]
+        if not (0 <= i < n_lat and 0 <= j < n_lon) or np.isnan(self.values[i, j, 0, 0]):
+            return None
+        return i, j
+
+    def cell_statistics(self, lat: float, lon: float) -> Optional[np.ndarray]:
+        """(CALENDAR_DAYS, len(stats)) memory-mapped view of a cell's statistics, or None outside the index"""
+        cell = self.cell(lat, lon)
+        return None if cell is None else self.values[cell[0], cell[1]]
+
+    def window(self, lat: float, lon: float, start: datetime, days: int) -> Optional[Dict[str, np.ndarray]]:
+        """Statistics for `days` consecutive days from start, or None outside the indexed region"""
+        cell = self.cell(lat, lon)
+        if cell is None:
+            return None
+        slots = calendar_slot(pd.date_range(start, periods=days, freq='D'))
+        block = self.values[cell[0], cell[1]][slots]  # copies only these days
+        return {name: block[:, k] for name, k in self.stats.items()}
+
+    def annual_mean(self, lat: float, lon: float, stat: str) -> Optional[float]:
+        cell = self.cell(lat, lon)
+        if cell is None:
+            return None
+        return float(self.values[cell[0], cell[1], :, self.stats[stat]].mean())
+
+
+def region_cells(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Grid cell centers covering a lat/lon box (which must not cross the antimeridian)"""
+    lat_start, lon_start = snap_to_grid(lat_min, lon_min)
+    lat_end, lon_end = snap_to_grid(lat_max, lon_max)
+    if lat_start > lat_end or lon_start > lon_end:
+        raise ValueError("Region must have lat_min <= lat_max and lon_min <= lon_max")
+    lats = np.arange(round(lat_start / GRID_LAT_STEP), round(lat_end / GRID_LAT_STEP) + 1) * GRID_LAT_STEP
+    lons = np.arange(round(lon_start / GRID_LON_STEP), round(lon_end / GRID_LON_STEP) + 1) * GRID_LON_STEP
+    return lats, lons
+
+
+async def fetch_cell_history(client: NasaPowerClient, url: str, lat: float, lon: float,
+                             years: Sequence[int]) -> pd.DataFrame:
+    """Daily history of one cell, requested one calendar year at a time"""
+    responses = await asyncio.gather(*(
+        client.get_json(url, params={
+            "parameters": POWER_PARAMETERS,
+            "start": f"{year}0101",
+            "end": f"{year}1231",
+            "latitude": lat,
+            "longitude": lon,
+            "format": "JSON",
+            "community": "AG",
+        })
+        for year in years
+    ))
+    return pd.concat([parse_daily_point(data) for data in responses], ignore_index=True)
+
+
+async def build_index(output: str, lat_min: float, lat_max: float, lon_min: float, lon_max: float,
+                      start_year: int, end_year: int, url: str, cell_parallelism: int = 4,
+                      max_per_host: int = 8) -> Dict:
+    """
+    Fetch history for every cell in the region and write the index to `output`.
+    Cells whose history can't be fetched are left as NaN, so lookups there fall
+    back to live NASA data; rerun the build to fill them in.
+    """
+    lats, lons = region_cells(lat_min, lat_max, lon_min, lon_max)
+    years = list(range(start_year, end_year + 1))
+    os.makedirs(output, exist_ok=True)
+
+    # Written in place through a memmap and swapped in at the end, so the array never has to fit in memory
+    array_path = os.path.join(output, ARRAY_FILE)
+    tmp_path = f"{array_path}.{os.getpid()}.tmp"
+    values = np.lib.format.open_memmap(
+        tmp_path, mode='w+', dtype=np.float32, shape=(len(lats), len(lons), CALENDAR_DAYS, len(INDEX_STATS))
+    )
+    values[:] = np.nan
+
+    client = NasaPowerClient(max_per_host=max_per_host)
+    limit = asyncio.Semaphore(cell_parallelism)
+    failed: List[Tuple[float, float]] = []
+    done = 0
+
+    async def build_cell(i: int, j: int) -> None:
+        nonlocal done
+        lat, lon = float(lats[i]), float(lons[j])
+        async with limit:
+            try:
+                history = await fetch_cell_history(client, url, lat, lon, years)
+                values[i, j] = daily_statistics(history)
+            except Exception as e:
+                print(f"⚠ Cell ({lat}, {lon}) failed: {e}")
+                failed.append((lat, lon))
+        done += 1
+        if done % 25 == 0:
+            print(f"  {done}/{len(lats) * len(lons)} cells")
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(build_cell(i, j) for i in range(len(lats)) for j in range(len(lons))))
+    finally:
+        await client.aclose()
+    values.flush()
+    del values
+    os.replace(tmp_path, array_path)
+
+    meta = {
+        "lat_min": float(lats[0]),
+        "lon_min": float(lons[0]),
+        "shape": [len(lats), len(lons), CALENDAR_DAYS, len(INDEX_STATS)],
+        "stats": INDEX_STATS,
+        "years": [start_year, end_year],
+        "rain_day_mm": RAIN_DAY_MM,
+        "smoothing_half_window": SMOOTHING_HALF_WINDOW,
+        "failed_cells": failed,
+        "built_at": datetime.now().isoformat(timespec='seconds'),
+    }
+    meta_path = os.path.join(output, META_FILE)
+    with open(f"{meta_path}.tmp", "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+    print(f"✓ Built climatology index for {len(lats) * len(lons) - len(failed)} cells "
+          f"in {time.perf_counter() - started:.0f}s ({len(failed)} failed)")
+    return meta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lat-min", type=float, required=True)
+    parser.add_argument("--lat-max", type=float, required=True)
+    parser.add_argument("--lon-min", type=float, required=True)
+    parser.add_argument("--lon-max", type=float, required=True)
+    parser.add_argument("--start-year", type=int, default=datetime.now().year - 30)
+    parser.add_argument("--end-year", type=int, default=datetime.now().year - 1)
+    parser.add_argument("--output", required=True, help="directory for the index files")
+    parser.add_argument("--url", default=os.getenv("NASA_POWER_URL", "https://power.larc.nasa.gov/api/temporal/daily/point"))
+    parser.add_argument("--cell-parallelism", type=int, default=4, help="cells fetched at the same time")
+    parser.add_argument("--max-per-host", type=int, default=8, help="concurrent NASA requests")
+    args = parser.parse_args()
+
+    asyncio.run(build_index(
+        args.output, args.lat_min, args.lat_max, args.lon_min, args.lon_max,
+        args.start_year, args.end_year, args.url, args.cell_parallelism, args.max_per_host
+    ))
+
+
+if __name__ == "__main__":
+    main()
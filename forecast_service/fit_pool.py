@@ -0,0 +1,84 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class FitPoolSaturated(Exception):
+    """Raised when the pool already has as many fits running and queued as it accepts"""
+
+
+class FitPoolBroken(Exception):
+    """Raised for fits lost because a worker died; the pool has been replaced, so a retry can succeed"""
+
+
+class FitPool:
+    """
+    Bounded process pool for CPU-bound model fits.
+
+    At most `workers` fits run in parallel and at most `queue_depth` more wait
+    for a free worker; anything beyond that is rejected immediately with
+    FitPoolSaturated instead of piling up behind the running fits. A worker
+    that dies (killed for memory, a crash in native code) breaks the whole
+    executor, so it is replaced and the fits it took down fail with FitPoolBroken.
+    """
+
+    def __init__(self, workers: int, queue_depth: int,
+                 initializer: Optional[Callable[..., Any]] = None, initargs: Tuple = ()):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.pending = 0
+        self.restarts = 0
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn keeps workers independent of the server's event loop and threads
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._initializer,
+            initargs=self._initargs,
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in a worker process without blocking the event loop"""
+        if self.pending >= self.capacity:
+            raise FitPoolSaturated(
+                f"{self.pending} model fits already running or queued (limit {self.capacity})"
+            )
+        self.pending += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            # Every fit in flight fails together; only the first one replaces the executor
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._new_executor()
+                self.restarts += 1
+            raise FitPoolBroken(f"model fit worker exited unexpectedly ({e})") from e
+        finally:
+            self.pending -= 1
+
+    async def start_workers(self, fn: Callable[[], Any]) -> List[Any]:
+        """
+        Spawn the workers up front instead of on first use, returning fn()
+        from one call per worker slot. Workers run the pool initializer
+        before taking any task, so initializer work (such as model warm-up)
+        is done in every worker that answered.
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(self._executor, fn) for _ in range(self.workers)
+        ))
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
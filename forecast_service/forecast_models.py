@@ -0,0 +1,277 @@
+import importlib.util
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from model_state import ModelState
+
+# Climatology model settings: harmonics of the annual cycle and the residual quantiles used as bands
+CLIMATOLOGY_HARMONICS = 3
+CLIMATOLOGY_INTERVAL = (0.1, 0.9)
+
+# Seconds spent in each step of the most recent train_with_timings() call in this process
+_stage_timings: Dict[str, float] = {}
+
+@contextmanager
+def _timed(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_timings[name] = _stage_timings.get(name, 0.0) + time.perf_counter() - started
+
+def train_with_timings(train: Callable[[pd.DataFrame, str], List[Dict]],
+                       df: pd.DataFrame, column: str) -> Tuple[List[Dict], Dict[str, float]]:
+    """Run a train function and also return how long its fit, predict and result-building steps took"""
+    _stage_timings.clear()
+    result = train(df, column)
+    return result, dict(_stage_timings)
+
+def _fit_prophet(df: pd.DataFrame, column: str, init: Optional[Dict] = None) -> Tuple[List[Dict], Dict, float]:
+    """
+    Fit Prophet and forecast, optionally warm-started from an earlier fit's
+    parameters. Also returns the fitted parameters and the in-sample mean
+    absolute error.
+    """
+    from prophet import Prophet  # imported lazily, see MODEL_ENGINES
+    
+    prophet_df = df[['date', column]].rename(columns={'date': 'ds', column: 'y'})
+    
+    model = Prophet(
+        daily_seasonality=False,
+        weekly_seasonality=True,
+        yearly_seasonality=True,
+        seasonality_mode='multiplicative'
+    )
+    with _timed("model_fit"):
+        # Starting the optimizer from the previous optimum converges in a fraction of the iterations
+        model.fit(prophet_df, init=init) if init is not None else model.fit(prophet_df)
+    
+    # Generate future dates (365 days = ~12 months)
+    with _timed("model_predict"):
+        future = model.make_future_dataframe(periods=365, freq='D')
+        forecast = model.predict(future)
+    
+    # Extract only future predictions
+    with _timed("result_build"):
+        future_forecast = forecast[forecast['ds'] > df['date'].max()]
+        
+        # Pull whole columns out at once instead of building a Series per row
+        result = [
+            {'date': date, 'value': value, 'lower': lower, 'upper': upper}
+            for date, value, lower, upper in zip(
+                future_forecast['ds'].dt.strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+                future_forecast['yhat'].to_numpy(dtype=float).tolist(),
+                future_forecast['yhat_lower'].to_numpy(dtype=float).tolist(),
+                future_forecast['yhat_upper'].to_numpy(dtype=float).tolist()
+            )
+        ]
+        fitted = forecast.set_index('ds')['yhat'].reindex(prophet_df['ds']).to_numpy()
+        error = float(np.nanmean(np.abs(prophet_df['y'].to_numpy(dtype=float) - fitted)))
+        
+        # Parameters in the form Prophet.fit(init=...) takes
+        params = {name: float(model.params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+        params.update({name: model.params[name][0] for name in ('delta', 'beta')})
+    return result, params, error
+
+def train_prophet_model(df: pd.DataFrame, column: str) -> List[Dict]:
+    """Train Prophet model and generate forecasts"""
+    return _fit_prophet(df, column)[0]
+
+def _arima_points(last_date, values: Iterable[float]) -> List[Dict]:
+    """Daily forecast points after last_date with simple confidence intervals (±10%)"""
+    return [
+        {
+            'date': (last_date + timedelta(days=i + 1)).isoformat(),
+            'value': float(val),
+            'lower': float(val * 0.9),
+            'upper': float(val * 1.1)
+        }
+        for i, val in enumerate(values)
+    ]
+
+def _fit_arima(df: pd.DataFrame, column: str, params: Optional[np.ndarray] = None) -> Tuple[List[Dict], np.ndarray, float]:
+    """
+    Fit ARIMA and forecast. Given earlier parameters, the model isn't
+    re-estimated: the Kalman filter just runs over the extended history.
+    Also returns the parameters and the in-sample mean absolute error.
+    """
+    from statsmodels.tsa.arima.model import ARIMA  # imported lazily, see MODEL_ENGINES
+    
+    values = df[column].values
+    
+    # Fit ARIMA model (p=5, d=1, q=0)
+    with _timed("model_fit"):
+        model = ARIMA(values, order=(5, 1, 0))
+        fitted = model.filter(params) if params is not None else model.fit()
+    
+    # Forecast 365 days
+    with _timed("model_predict"):
+        forecast = fitted.forecast(steps=365)
+    
+    with _timed("result_build"):
+        # The first residual is the undifferenced first value, not an error
+        error = float(np.nanmean(np.abs(fitted.resid[1:])))
+        return _arima_points(df['date'].max(), forecast), np.asarray(fitted.params), error
+
+def train_arima_model(df: pd.DataFrame, column: str) -> List[Dict]:
+    """Fallback ARIMA model for forecasting"""
+    try:
+        return _fit_arima(df, column)[0]
+    except Exception as e:
+        print(f"ARIMA error: {e}")
+        # Fallback to simple mean projection
+        mean_val = float(np.nanmean(df[column].to_numpy(dtype=float)))
+        return _arima_points(df['date'].max(), [mean_val] * 365)
+
+def _climatology_design(days: np.ndarray, harmonics: int, trend: bool) -> np.ndarray:
+    """Design matrix with an intercept, optional linear trend and annual harmonics"""
+    years = days / 365.25
+    columns = [np.ones_like(years)]
+    if trend:
+        columns.append(years)
+    for k in range(1, harmonics + 1):
+        angle = 2 * np.pi * k * years
+        columns.extend([np.sin(angle), np.cos(angle)])
+    return np.column_stack(columns)
+
+def train_climatology_model(df: pd.DataFrame, column: str) -> List[Dict]:
+    """Closed-form climatology: least-squares trend plus annual harmonics, with empirical quantile bands"""
+    dates = df['date'].to_numpy(dtype='datetime64[D]')
+    values = df[column].to_numpy(dtype=float)
+    valid = np.isfinite(values)
+    dates, values = dates[valid], values[valid]
+    
+    # Short histories can't separate a trend or higher harmonics from the seasonal cycle
+    span_days = int((dates.max() - dates.min()).astype(int))
+    trend = span_days >= 2 * 365
+    harmonics = CLIMATOLOGY_HARMONICS if span_days >= 365 else 1
+    
+    origin = dates.min()
+    with _timed("model_fit"):
+        design = _climatology_design((dates - origin).astype(float), harmonics, trend)
+        coef, *_ = np.linalg.lstsq(design, values, rcond=None)
+        lower_q, upper_q = np.quantile(values - design @ coef, CLIMATOLOGY_INTERVAL).tolist()
+    
+    # Forecast 365 days
+    with _timed("model_predict"):
+        future = dates.max() + np.arange(1, 366)
+        forecast = _climatology_design((future - origin).astype(float), harmonics, trend) @ coef
+    
+    with _timed("result_build"):
+        return [
+            {
+                'date': date.isoformat(),
+                'value': value,
+                'lower': value + lower_q,
+                'upper': value + upper_q
+            }
+            for date, value in zip(pd.to_datetime(future), forecast.tolist())
+        ]
+
+class ForecastEngine:
+    """A forecasting backend whose model library is imported on first use"""
+    
+    def __init__(self, name: str, train: Callable[[pd.DataFrame, str], List[Dict]],
+                 module: Optional[str] = None, inline: bool = False,
+                 fit_state: Optional[Callable[[pd.DataFrame, str, Any], Tuple[List[Dict], Any, float]]] = None):
+        self.name = name  # reported as model_used
+        self.train = train
+        self.module = module
+        self.inline = inline  # cheap enough to run on the event loop instead of the process pool
+        # (df, column, previous params or None) -> (forecast, params, in-sample error); see update_model_state
+        self.fit_state = fit_state
+    
+    @property
+    def available(self) -> bool:
+        # find_spec on a top-level package checks installation without importing it
+        return self.module is None or importlib.util.find_spec(self.module) is not None
+
+# Forecasting engines selectable per request. Prophet and statsmodels are slow to import, so they are
+# only loaded when an engine first needs them; here we just check that they are installed
+MODEL_ENGINES: Dict[str, ForecastEngine] = {
+    key: engine
+    for key, engine in {
+        'prophet': ForecastEngine("Prophet", train_prophet_model, module="prophet", fit_state=_fit_prophet),
+        'arima': ForecastEngine("ARIMA", train_arima_model, module="statsmodels", fit_state=_fit_arima),
+        'climatology': ForecastEngine("Climatology", train_climatology_model, inline=True),
+    }.items()
+    if engine.available
+}
+
+# Preferred engine that is installed; climatology needs only numpy, so it is always there
+DEFAULT_ENGINE = next(key for key in ('prophet', 'arima', 'climatology') if key in MODEL_ENGINES)
+if DEFAULT_ENGINE == 'prophet':
+    print("✓ Using Prophet for forecasting")
+else:
+    print(f"⚠ Prophet not available, using {MODEL_ENGINES[DEFAULT_ENGINE].name} fallback")
+
+def fit_model_state(key: str, df: pd.DataFrame, column: str) -> Tuple[List[Dict], Optional[ModelState], Dict[str, float]]:
+    """
+    Full fit that also returns the model state later days can be added to,
+    plus stage timings like train_with_timings. If the engine's stateful fit
+    fails, falls back to its plain train function and returns no state.
+    """
+    _stage_timings.clear()
+    engine = MODEL_ENGINES[key]
+    try:
+        result, params, error = engine.fit_state(df, column, None)
+    except Exception as e:
+        print(f"⚠ {engine.name} fit failed ({e}), not keeping a model state")
+        return engine.train(df, column), None, dict(_stage_timings)
+    state = ModelState(
+        key, column, df['date'].min(), df['date'].max(), params, result, error
+    )
+    return result, state, dict(_stage_timings)
+
+def update_model_state(key: str, state: ModelState, df: pd.DataFrame,
+                       column: str) -> Tuple[List[Dict], Optional[ModelState], Dict[str, float]]:
+    """
+    Bring a model state up to the end of df starting from its fitted parameters
+    rather than from scratch. A state whose update fails is replaced by a full
+    fit, recognisable by its zero update count.
+    """
+    _stage_timings.clear()
+    try:
+        result, params, error = MODEL_ENGINES[key].fit_state(df, column, state.params)
+    except Exception as e:
+        print(f"⚠ Incremental update of {key} failed ({e}), refitting")
+        return fit_model_state(key, df, column)
+    updated = ModelState(
+        key, column, df['date'].min(), df['date'].max(), params, result, error,
+        fitted_at=state.fitted_at, updates=state.updates + 1
+    )
+    return result, updated, dict(_stage_timings)
+
+def _synthetic_history(days: int = 120) -> pd.DataFrame:
+    dates = pd.date_range('2000-01-01', periods=days, freq='D')
+    seasonal = 15 + 10 * np.sin(2 * np.pi * dates.dayofyear.to_numpy() / 365)
+    return pd.DataFrame({'date': dates, 'temperature': seasonal + np.random.default_rng(0).normal(0, 1, days)})
+
+# Warm-up results for this process, filled in by warm_up_engines()
+WARMUP_STATUS: Dict[str, str] = {}
+
+def warm_up_engines(keys: Iterable[str]) -> Dict[str, str]:
+    """
+    Import each engine's library and fit a tiny synthetic series so the first
+    real fit doesn't pay for imports or Prophet's Stan backend start-up.
+    Never raises; failures are recorded as 'failed' in WARMUP_STATUS.
+    """
+    history = _synthetic_history()
+    for key in keys:
+        started = time.perf_counter()
+        try:
+            engine = MODEL_ENGINES[key]
+            engine.train(history, 'temperature')
+            WARMUP_STATUS[key] = "warm"
+            print(f"✓ Warmed up {engine.name} in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            WARMUP_STATUS[key] = "failed"
+            print(f"⚠ Warm-up of {key} failed: {e}")
+    return dict(WARMUP_STATUS)
+
+def get_warmup_status() -> Dict[str, str]:
+    return dict(WARMUP_STATUS)
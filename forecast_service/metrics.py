@@ -0,0 +1,258 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds, from cached hits (ms) to multi-second Prophet fits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # per label set: [bucket counts..., sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * len(self.buckets) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# HTTP layer
+HTTP_REQUEST_SECONDS = Histogram(
+    "forecast_http_request_duration_seconds", "Time to serve an HTTP request", ("endpoint", "method", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "forecast_http_requests_in_flight", "HTTP requests currently being served", ("endpoint",)
+)
+
+# Hot-path stages inside the forecast endpoints
+STAGE_SECONDS = Histogram(
+    "forecast_stage_duration_seconds", "Time spent in each stage of a forecast request", ("endpoint", "stage")
+)
+
+# Upstream NASA POWER API
+UPSTREAM_SECONDS = Histogram(
+    "nasa_power_request_duration_seconds", "Time per NASA POWER request attempt", ("outcome",)
+)
+UPSTREAM_REQUESTS = Counter(
+    "nasa_power_requests_total", "NASA POWER request attempts by outcome (ok, http_<status>, timeout, error)", ("outcome",)
+)
+UPSTREAM_IN_FLIGHT = Gauge("nasa_power_requests_in_flight", "NASA POWER requests currently open")
+
+# Pooled model fits: full fits by reason (no_state, scheduled, drift, ...) and incremental updates
+MODEL_FITS = Counter(
+    "forecast_model_fits_total", "Pooled model fits by kind (full, incremental) and full-fit reason", ("kind", "reason")
+)
+
+# Admission control
+ADMISSION_REJECTED = Counter(
+    "forecast_admission_rejected_total", "Requests shed by admission control (429 queue full, 503 queue timeout)",
+    ("endpoint", "status")
+)
+
+# Shared resources, refreshed from their own counters when /metrics is scraped
+FIT_POOL_PENDING = Gauge("forecast_fit_pool_pending", "Model fits running or queued in the process pool")
+FIT_POOL_CAPACITY = Gauge("forecast_fit_pool_capacity", "Model fits the pool accepts before rejecting with 503")
+FIT_POOL_RESTARTS = Gauge("forecast_fit_pool_restarts", "Times the process pool was replaced after a worker died")
+FORECAST_CACHE_STATS = Gauge(
+    "forecast_cache", "Forecast cache counters (entries, bytes, hits, disk_hits, misses, evictions)", ("stat",)
+)
+COALESCING_STATS = Gauge(
+    "forecast_coalescing", "Request coalescing counters (in_flight, started, coalesced)", ("stat",)
+)
+ADMISSION_SLOTS = Gauge(
+    "forecast_admission_requests", "Requests holding (active) or waiting for (waiting) an admission slot", ("endpoint", "state")
+)
+
+
+class RequestTimings:
+    """Stage durations recorded while serving one request"""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = []
+
+    def server_timing(self) -> str:
+        """Server-Timing header value; repeated stages (e.g. per-location fetches) are summed"""
+        totals: Dict[str, float] = {}
+        for name, seconds in self.stages:
+            totals[name] = totals.get(name, 0.0) + seconds
+        totals["total"] = time.perf_counter() - self.started
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Record a stage measured elsewhere (e.g. inside a fit worker) against the current request"""
+    timings = _current_timings.get()
+    STAGE_SECONDS.observe(seconds, endpoint=timings.endpoint if timings else "background", stage=name)
+    if timings is not None:
+        timings.stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a named stage of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency and in-flight gauges, and
+    optionally adding a Server-Timing header with the per-stage breakdown.
+    """
+
+    def __init__(self, app, route_label: Callable[[str], str], server_timing: bool = False):
+        self.app = app
+        self.route_label = route_label
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self.route_label(scope["path"])
+        timings = RequestTimings(endpoint)
+        token = _current_timings.set(timings)
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - timings.started, endpoint=endpoint, method=scope["method"], status=status
+            )
+            _current_timings.reset(token)
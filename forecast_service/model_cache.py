@@ -0,0 +1,143 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class PickleStore:
+    """
+    Directory of pickled entries, one file per key named by the key's SHA-1.
+    Each entry is written to a temporary file and moved into place, so readers
+    never see a partial one. Read and write errors are printed and treated as
+    a missing entry, and a file whose stored key differs (a hash collision) is ignored.
+    """
+
+    def __init__(self, directory: str, suffix: str, label: str):
+        self.directory = directory
+        self.suffix = suffix
+        self.label = label
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}{self.suffix}")
+
+    def load(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """The fields stored for key, or None"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            print(f"{self.label} read error ({path}): {e}")
+            return None
+        return entry if entry['key'] == key else None
+
+    def save(self, key: Hashable, **fields: Any) -> None:
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'key': key, **fields}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"{self.label} write error ({path}): {e}")
+
+
+class ForecastCache:
+    """
+    In-memory LRU cache for fit results, bounded by size in bytes and by age.
+
+    Entries are keyed by (location, history range, model) and expire after
+    `ttl` seconds. When `persist_dir` is set, every entry is also pickled to
+    disk so a restarted process can serve it without refitting.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, persist_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.persist_dir = persist_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = PickleStore(persist_dir, ".pkl", "Forecast cache") if persist_dir else None
+
+    def _insert(self, key: Hashable, expires_at: float, value: Any, size: int) -> None:
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, old_size, _) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+
+    def _load_from_disk(self, key: Hashable) -> Optional[Any]:
+        entry = self._disk.load(key)
+        if entry is None or entry['expires_at'] <= time.time():
+            return None
+        value = pickle.loads(entry['payload'])
+        self._insert(key, entry['expires_at'], value, len(entry['payload']))
+        return value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+
+            if self._disk is not None:
+                value = self._load_from_disk(key)
+                if value is not None:
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting least recently used entries past the size limit"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, expires_at, value, len(payload))
+
+        if self._disk is not None:
+            self._disk.save(key, expires_at=expires_at, payload=payload)
+
+    def stored_at(self, key: Hashable) -> Optional[float]:
+        """When the in-memory entry for key was stored (epoch seconds), without counting a lookup"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] - self.ttl if entry is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            }
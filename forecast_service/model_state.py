@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from model_cache import PickleStore
+
+
+class ModelState:
+    """
+    What an engine needs to update a fit when new days are appended instead of
+    refitting from scratch: its fitted parameters, the history they were fitted
+    on and the forecast they produced, which is served again for the same
+    history and which new observations are checked against to detect drift.
+    """
+
+    def __init__(self, engine: str, column: str, start: pd.Timestamp, end: pd.Timestamp,
+                 params: Any, result: List[Dict], error_scale: float,
+                 fitted_at: Optional[float] = None, updates: int = 0):
+        self.engine = engine
+        self.column = column
+        self.start = start  # first day of the history fitted on
+        self.end = end  # last day; the stored forecast starts the day after
+        self.params = params
+        self.result = result  # forecast points as the engine returned them
+        self.forecast = np.array([p['value'] for p in result], dtype=float)
+        self.error_scale = error_scale  # in-sample mean absolute error of the fit
+        self.fitted_at = time.time() if fitted_at is None else fitted_at  # last full fit
+        self.updates = updates  # incremental updates since then
+
+    def drift(self, df: pd.DataFrame) -> float:
+        """
+        Mean absolute error of the stored forecast on the days in df after `end`,
+        relative to the fit's in-sample error; 0 when there are no such days.
+        """
+        new = df[df['date'] > self.end]
+        offsets = (new['date'] - self.end).dt.days.to_numpy() - 1
+        observed = new[self.column].to_numpy(dtype=float)
+        usable = (offsets < len(self.forecast)) & np.isfinite(observed)
+        if not usable.any():
+            return 0.0
+        error = np.abs(observed[usable] - self.forecast[offsets[usable]]).mean()
+        return float(error / max(self.error_scale, 1e-6))
+
+    def covers(self, df: pd.DataFrame) -> bool:
+        """Whether df is the history this state was fitted on, so its result can be served as is"""
+        return df['date'].min() == self.start and df['date'].max() == self.end
+
+    def refit_reason(self, df: pd.DataFrame, refit_after: float, drift_factor: float) -> Optional[str]:
+        """Why df needs a full fit rather than an update of this state, or None if it can be updated"""
+        if df['date'].min() != self.start or df['date'].max() <= self.end:
+            return "history_changed"
+        if time.time() - self.fitted_at >= refit_after:
+            return "scheduled"
+        if self.drift(df) > drift_factor:
+            return "drift"
+        return None
+
+
+class ModelStateStore:
+    """
+    Per-location model states, keyed by (location, history start, engine, column).
+
+    Holds up to `max_entries` states in memory (least recently used are
+    dropped). When `persist_dir` is set, every state is also pickled to disk
+    so a restarted process keeps updating instead of refitting.
+    """
+
+    def __init__(self, max_entries: int, persist_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.full_fits = 0
+        self.incremental_updates = 0
+        self.reused = 0
+        self.refit_reasons: Dict[str, int] = {}
+        self._entries: "OrderedDict[Hashable, ModelState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = PickleStore(persist_dir, ".state.pkl", "Model state") if persist_dir else None
+
+    def _insert(self, key: Hashable, state: ModelState) -> None:
+        self._entries[key] = state
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[ModelState]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is not None:
+                self._entries.move_to_end(key)
+                return state
+            entry = self._disk.load(key) if self._disk is not None else None
+            if entry is None:
+                return None
+            self._insert(key, entry['state'])
+            return entry['state']
+
+    def put(self, key: Hashable, state: ModelState) -> None:
+        with self._lock:
+            self._insert(key, state)
+
+        if self._disk is not None:
+            self._disk.save(key, state=state)
+
+    def record(self, reason: Optional[str]) -> None:
+        """Count a fit: an incremental update when reason is None, otherwise a full fit for that reason"""
+        with self._lock:
+            if reason is None:
+                self.incremental_updates += 1
+            else:
+                self.full_fits += 1
+                self.refit_reasons[reason] = self.refit_reasons.get(reason, 0) + 1
+
+    def record_reuse(self) -> None:
+        """Count a stored result served again instead of fitting"""
+        with self._lock:
+            self.reused += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "full_fits": self.full_fits,
+                "incremental_updates": self.incremental_updates,
+                "reused": self.reused,
+                "refit_reasons": dict(self.refit_reasons),
+            }
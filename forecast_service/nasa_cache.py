@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Columns persisted for every cached day, in DataFrame naming
+CACHE_COLUMNS = ['temperature', 'rainfall', 'windspeed']
+
+# NASA POWER marks days with no data (e.g. not yet processed) with this value
+NASA_FILL_VALUE = -999.0
+
+
+class NasaPowerCache:
+    """
+    Persistent columnar store for daily NASA POWER series.
+
+    Each location gets one compact .npz file holding a sorted date column plus
+    one float column per variable. Days that NASA returned as fill values are
+    never persisted. When those are the latest days NASA was asked for (not yet
+    published), their span is noted in a small JSON file next to the .npz and
+    they aren't reported missing again until `unpublished_ttl` seconds have passed.
+    """
+
+    def __init__(self, cache_dir: str, unpublished_ttl: float = 3 * 3600):
+        self.cache_dir = cache_dir
+        self.unpublished_ttl = unpublished_ttl
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cell_key(lat: float, lon: float) -> str:
+        """File-safe key for a location"""
+        return f"{lat:+09.4f}_{lon:+010.4f}".replace('+', 'p').replace('-', 'm')
+
+    def _path(self, lat: float, lon: float) -> str:
+        return os.path.join(self.cache_dir, f"{self.cell_key(lat, lon)}.npz")
+
+    def _unpublished_path(self, lat: float, lon: float) -> str:
+        return os.path.join(self.cache_dir, f"{self.cell_key(lat, lon)}.unpublished.json")
+
+    def _read(self, path: str) -> Optional[pd.DataFrame]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return pd.DataFrame({
+                    'date': data['date'].astype('datetime64[ns]'),
+                    **{col: data[col] for col in CACHE_COLUMNS}
+                })
+        except Exception as e:
+            print(f"NASA cache read error ({path}): {e}")
+            return None
+
+    def load(self, lat: float, lon: float, start: datetime, end: datetime) -> pd.DataFrame:
+        """Return cached rows for the location within [start, end]"""
+        df = self._read(self._path(lat, lon))
+        if df is None:
+            return pd.DataFrame(columns=['date'] + CACHE_COLUMNS)
+        mask = (df['date'] >= start) & (df['date'] <= end)
+        return df.loc[mask].reset_index(drop=True)
+
+    def unpublished(self, lat: float, lon: float) -> Optional[Tuple[datetime, datetime]]:
+        """Span of recent days NASA returned as fill values for the location, unless that was too long ago"""
+        path = self._unpublished_path(lat, lon)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                marker = json.load(f)
+        except Exception as e:
+            print(f"NASA cache read error ({path}): {e}")
+            return None
+        if time.time() - marker['checked_at'] >= self.unpublished_ttl:
+            return None
+        return datetime.fromisoformat(marker['start']), datetime.fromisoformat(marker['end'])
+
+    @staticmethod
+    def missing_ranges(cached: pd.DataFrame, start: datetime, end: datetime,
+                       unpublished: Optional[Tuple[datetime, datetime]] = None) -> List[Tuple[datetime, datetime]]:
+        """
+        Contiguous (start, end) date spans in [start, end] not present in cached,
+        leaving out the `unpublished` span since NASA has nothing for it yet
+        """
+        wanted = pd.date_range(start, end, freq='D')
+        have = pd.DatetimeIndex(cached['date']) if not cached.empty else pd.DatetimeIndex([])
+        missing = wanted.difference(have)
+        if unpublished is not None:
+            missing = missing[(missing < unpublished[0]) | (missing > unpublished[1])]
+        if missing.empty:
+            return []
+
+        # Split at every break in the daily sequence
+        breaks = np.flatnonzero(np.diff(missing.asi8) != 86_400 * 10**9) + 1
+        return [
+            (run[0].to_pydatetime(), run[-1].to_pydatetime())
+            for run in np.split(missing, breaks)
+        ]
+
+    def store(self, lat: float, lon: float, df: pd.DataFrame) -> None:
+        """Merge freshly fetched rows into the location's file, noting fill values after its last day"""
+        is_valid = (df[CACHE_COLUMNS] != NASA_FILL_VALUE).all(axis=1)
+        valid = df.loc[is_valid]
+        fill_dates = pd.DatetimeIndex(df.loc[~is_valid, 'date'])
+
+        path = self._path(lat, lon)
+        with self._lock:
+            existing = self._read(path)
+            merged = existing
+            if not valid.empty:
+                merged = valid if existing is None else pd.concat([existing, valid], ignore_index=True)
+                merged = merged.drop_duplicates('date', keep='last').sort_values('date')
+
+                # Write to a temp file and swap so readers never see a partial file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.savez_compressed(
+                        f,
+                        date=merged['date'].values.astype('datetime64[D]'),
+                        **{col: merged[col].to_numpy(dtype=np.float64) for col in CACHE_COLUMNS}
+                    )
+                os.replace(tmp_path, path)
+
+            # Fill values past the last stored day are days NASA hasn't published yet
+            if merged is not None and not merged.empty:
+                fill_dates = fill_dates[fill_dates > merged['date'].max()]
+            if not fill_dates.empty:
+                self._mark_unpublished(lat, lon, fill_dates.min(), fill_dates.max())
+
+    def _mark_unpublished(self, lat: float, lon: float, start: pd.Timestamp, end: pd.Timestamp) -> None:
+        path = self._unpublished_path(lat, lon)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'start': start.date().isoformat(),
+                'end': end.date().isoformat(),
+                'checked_at': time.time()
+            }, f)
+        os.replace(tmp_path, path)
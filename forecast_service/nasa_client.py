@@ -0,0 +1,109 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+import pandas as pd
+
+from metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_REQUESTS, UPSTREAM_SECONDS
+
+# Upstream statuses worth retrying; anything else is returned to the caller as-is
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Daily point parameters requested from NASA POWER: temperature, precipitation, wind speed
+POWER_PARAMETERS = "T2M,PRECTOTCORR,WS2M"
+
+
+def parse_daily_point(data: Dict[str, Any]) -> pd.DataFrame:
+    """DataFrame with date, temperature, rainfall and windspeed columns from a daily point response"""
+    params = data['properties']['parameter']
+    temperatures = params.get('T2M', {})
+    rainfall = params.get('PRECTOTCORR', {})
+    windspeed = params.get('WS2M', {})
+
+    dates = list(temperatures.keys())
+    return pd.DataFrame({
+        'date': pd.to_datetime(dates, format='%Y%m%d'),
+        'temperature': [temperatures[d] for d in dates],
+        'rainfall': [rainfall.get(d, 0) for d in dates],
+        'windspeed': [windspeed.get(d, 0) for d in dates]
+    })
+
+
+class NasaPowerClient:
+    """
+    Shared async HTTP client for the NASA POWER API.
+
+    Wraps a single pooled keep-alive httpx.AsyncClient, caps concurrent requests
+    per host and retries transient failures with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 8,
+        max_connections: int = 32,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _timed_get(self, url: str, params: Optional[Dict[str, Any]]) -> httpx.Response:
+        outcome = "error"
+        started = time.perf_counter()
+        UPSTREAM_IN_FLIGHT.inc()
+        try:
+            response = await self._client.get(url, params=params)
+            outcome = "ok" if response.is_success else f"http_{response.status_code}"
+            return response
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec()
+            UPSTREAM_REQUESTS.inc(outcome=outcome)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET a JSON document, retrying timeouts, connection errors and 429/5xx responses"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Only hold the per-host slot for the request itself, not the backoff
+                async with self._host_limit(url):
+                    response = await self._timed_get(url, params)
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                print(f"NASA API request failed ({e!r}), retrying (attempt {attempt + 1})")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                print(f"NASA API returned {response.status_code}, retrying (attempt {attempt + 1})")
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
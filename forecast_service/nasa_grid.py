@@ -0,0 +1,21 @@
+import math
+from typing import Tuple
+
+# NASA POWER meteorology (T2M, PRECTOTCORR, WS2M) comes from MERRA-2 on a 0.5° x 0.625° grid,
+# so every point inside a cell returns the same daily series
+GRID_LAT_STEP = 0.5
+GRID_LON_STEP = 0.625
+
+
+def snap_to_grid(lat: float, lon: float) -> Tuple[float, float]:
+    """Map a coordinate to the center of the NASA POWER grid cell that contains it"""
+    grid_lat = math.floor(lat / GRID_LAT_STEP + 0.5) * GRID_LAT_STEP
+    grid_lat = min(90.0, max(-90.0, grid_lat))
+
+    grid_lon = math.floor(lon / GRID_LON_STEP + 0.5) * GRID_LON_STEP
+    if grid_lon >= 180.0:
+        grid_lon -= 360.0
+    elif grid_lon < -180.0:
+        grid_lon += 360.0
+
+    return grid_lat, grid_lon
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class HotLocations:
+    """
+    Request counts per key (location plus whatever else identifies the work),
+    decayed on every scheduler tick so recent demand outweighs old demand.
+    Holds at most `max_keys`; once past that, the colder half is dropped.
+    """
+
+    def __init__(self, max_keys: int = 10000, decay: float = 0.5):
+        self.max_keys = max_keys
+        self.decay = decay
+        self._counts: Dict[Hashable, float] = {}
+
+    def record(self, key: Hashable) -> None:
+        self._counts[key] = self._counts.get(key, 0.0) + 1.0
+        if len(self._counts) > self.max_keys:
+            keep = self.top(self.max_keys // 2)
+            self._counts = {k: self._counts[k] for k in keep}
+
+    def top(self, n: int) -> List[Hashable]:
+        return sorted(self._counts, key=self._counts.get, reverse=True)[:n]
+
+    def age(self) -> None:
+        """Decay every count and forget keys nobody has asked for in a while"""
+        self._counts = {key: count * self.decay for key, count in self._counts.items() if count * self.decay >= 0.1}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class PrefetchScheduler:
+    """
+    Background task that refreshes the hottest keys every `interval` seconds,
+    one at a time, so it never competes with requests for more than one fetch
+    or fit. `refresh(key)` returns whether it did any work; `idle()` is checked
+    before each key and the rest of the tick is skipped while the service is busy.
+    """
+
+    def __init__(self, hot: HotLocations, refresh: Callable[[Hashable], Awaitable[bool]],
+                 interval: float, top_n: int, idle: Callable[[], bool] = lambda: True):
+        self.hot = hot
+        self.refresh = refresh
+        self.interval = interval
+        self.top_n = top_n
+        self.idle = idle
+        self.ticks = 0
+        self.refreshed = 0
+        self.skipped_busy = 0
+        self.failed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> None:
+        keys = self.hot.top(self.top_n)
+        self.hot.age()
+        self.ticks += 1
+        for key in keys:
+            if not self.idle():
+                self.skipped_busy += 1
+                break
+            try:
+                if await self.refresh(key):
+                    self.refreshed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠ Prefetch of {key} failed: {getattr(e, 'detail', e)}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked_keys": len(self.hot),
+            "interval_seconds": self.interval,
+            "top_n": self.top_n,
+            "ticks": self.ticks,
+            "refreshed": self.refreshed,
+            "skipped_busy": self.skipped_busy,
+            "failed": self.failed,
+        }
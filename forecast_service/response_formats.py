@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import zlib
+from email.utils import formatdate
+from typing import List, Optional, Sequence, Tuple
+
+import brotli
+import msgpack
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Same content as the JSON response, but series as one array per field and floats rounded
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.forecast.columnar+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+# Bodies smaller than this are sent uncompressed; headers would eat most of the saving
+MIN_COMPRESS_BYTES = 1024
+# Content codings we can produce, in order of preference when the client accepts several
+ENCODINGS = ("br", "gzip")
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+
+def _parse_q_list(header: str) -> List[Tuple[str, float]]:
+    """(token, q) pairs of an Accept / Accept-Encoding header"""
+    items = []
+    for part in header.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        items.append((token.lower(), q))
+    return items
+
+
+def _media_range_q(ranges: List[Tuple[str, float]], offer: str) -> float:
+    """q of the most specific media range matching offer, 0 if none does"""
+    offer_type = offer.split("/")[0]
+    best_specificity, best_q = -1, 0.0
+    for media_range, q in ranges:
+        if media_range == offer:
+            specificity = 2
+        elif media_range == f"{offer_type}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if specificity > best_specificity:
+            best_specificity, best_q = specificity, q
+    return best_q
+
+
+def negotiate_media_type(accept: Optional[str], offers: Sequence[str]) -> str:
+    """
+    Offer that best matches an Accept header. Ties go to the earlier offer;
+    a missing header or one that matches nothing gets the first offer.
+    """
+    if not accept:
+        return offers[0]
+    ranges = _parse_q_list(accept)
+    best, best_q = offers[0], 0.0
+    for offer in offers:
+        q = _media_range_q(ranges, offer)
+        if q > best_q:
+            best, best_q = offer, q
+    return best
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Content coding to use for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    codings = dict(_parse_q_list(accept_encoding))
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = codings.get(encoding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class StreamCompressor:
+    """Incremental compression for streamed bodies, flushing after every chunk so lines aren't held back"""
+
+    def __init__(self, encoding: Optional[str]):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: str) -> bytes:
+        data = chunk.encode()
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        if self.encoding == "gzip":
+            return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        if self.encoding == "gzip":
+            return self._compressor.flush()
+        return b""
+
+
+def pack_msgpack(payload) -> bytes:
+    # Single-precision floats: forecasts don't carry more than ~7 significant digits of information
+    return msgpack.packb(payload, use_single_float=True)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from everything that determines a representation"""
+    return '"' + hashlib.sha1(repr(parts).encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check, using weak comparison as RFC 9110 prescribes for it"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
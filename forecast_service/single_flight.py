@@ -0,0 +1,35 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Deduplicates identical concurrent calls.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task and receive its result or its exception.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.started += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one waiter disconnecting doesn't cancel the work for the others
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,51 @@
+import math
+import os
+import random
+import sys
+import tempfile
+import zlib
+
+import httpx
+import pandas as pd
+import pytest
+
+# Service configuration is read at import time, so it has to be in place before app is imported
+os.environ["NASA_CACHE_DIR"] = tempfile.mkdtemp(prefix="nasa-test-")
+os.environ["MODEL_CACHE_DIR"] = ""
+os.environ["WARMUP_MODELS"] = ""
+os.environ["PREFETCH_INTERVAL"] = "0"
+os.environ["FIT_WORKERS"] = "1"
+os.environ["FIT_QUEUE_DEPTH"] = "1"
+os.environ["NASA_RETRY_BACKOFF"] = "0.01"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fake_nasa_power(request: httpx.Request) -> httpx.Response:
+    """NASA POWER daily point response with a seasonal cycle plus noise that is fixed per date and location"""
+    params = request.url.params
+    dates = pd.date_range(pd.to_datetime(params["start"]), pd.to_datetime(params["end"]))
+    location = zlib.crc32(f"{params['latitude']},{params['longitude']}".encode())
+    temperature, rainfall, windspeed = {}, {}, {}
+    for date in dates:
+        rng = random.Random(date.toordinal() * 7919 + location)
+        key = date.strftime("%Y%m%d")
+        temperature[key] = round(15 + 10 * math.sin(2 * math.pi * date.dayofyear / 365) + rng.gauss(0, 2), 2)
+        rainfall[key] = round(max(0.0, rng.gauss(1, 3)), 2)
+        windspeed[key] = round(abs(rng.gauss(3, 1)), 2)
+    return httpx.Response(200, json={
+        "properties": {"parameter": {"T2M": temperature, "PRECTOTCORR": rainfall, "WS2M": windspeed}}
+    })
+
+
+@pytest.fixture(scope="session")
+def service():
+    import app
+    return app
+
+
+@pytest.fixture
+def client(service):
+    from fastapi.testclient import TestClient
+    with TestClient(service.app) as test_client:
+        service.nasa_client._client._transport = httpx.MockTransport(fake_nasa_power)
+        yield test_client
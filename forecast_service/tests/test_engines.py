@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_climatology_is_the_default_without_model_libraries():
+    # A fresh interpreter where neither Prophet nor statsmodels can be found
+    script = textwrap.dedent("""
+        import importlib.util
+        find_spec = importlib.util.find_spec
+        importlib.util.find_spec = lambda name, *args: None if name in ("prophet", "statsmodels") else find_spec(name, *args)
+
+        from fastapi.testclient import TestClient
+        import app
+
+        assert app.FORECAST_MODEL == "climatology", app.FORECAST_MODEL
+        with TestClient(app.app) as client:
+            assert client.get("/").json()["available_models"] == ["climatology"]
+            assert client.get("/health").status_code == 200
+    """)
+    env = {key: value for key, value in os.environ.items() if key != "FORECAST_MODEL"}
+    result = subprocess.run([sys.executable, "-c", script], cwd=SERVICE_DIR, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_health_is_ready_only_once_every_engine_is_warm(client, service, monkeypatch):
+    key = next(iter(service.engine_status))
+    monkeypatch.setitem(service.engine_status, key, "warm")
+    assert client.get("/health").status_code == 200
+
+    monkeypatch.setitem(service.engine_status, key, "warming")
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming"
+
+    monkeypatch.setitem(service.engine_status, key, "failed")
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json()["status"] == "failed"
+    assert response.json()["ready"] is False
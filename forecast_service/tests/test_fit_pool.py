@@ -0,0 +1,32 @@
+import asyncio
+import os
+
+import pytest
+
+from fit_pool import FitPool, FitPoolBroken
+
+
+def test_pool_recovers_after_a_worker_dies():
+    async def scenario():
+        pool = FitPool(workers=1, queue_depth=1)
+        try:
+            with pytest.raises(FitPoolBroken):
+                await pool.run(os._exit, 1)
+            assert pool.restarts == 1
+            assert await pool.run(abs, -1) == 1
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_broken_fit_is_a_retryable_503(client, service, monkeypatch):
+    async def crash(*args):
+        raise FitPoolBroken("worker exited")
+
+    monkeypatch.setattr(service.fit_pool, "run", crash)
+    body = {"latitude": 12.0, "longitude": 34.0, "start_date": "20220101", "end_date": "20231231", "model": "arima"}
+    response = client.post("/forecast", json=body)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(service.FIT_RETRY_AFTER)
@@ -0,0 +1,89 @@
+import json
+
+import msgpack
+import numpy as np
+import pytest
+
+from response_formats import COLUMNAR_JSON_MEDIA_TYPE, JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+FORECAST = {
+    "latitude": 51.5,
+    "longitude": -0.1,
+    "start_date": "20220101",
+    "end_date": "20231231",
+    "model": "climatology",
+}
+
+
+def _decode(response):
+    if response.headers["content-type"].startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content)
+    return json.loads(response.content)
+
+
+@pytest.mark.parametrize("media_type", [JSON_MEDIA_TYPE, COLUMNAR_JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE])
+def test_zero_forecast_months_gives_an_empty_forecast(client, media_type):
+    body = {**FORECAST, "forecast_months": 0, "variables": ["rainfall"]}
+    response = client.post("/forecast", json=body, headers={"Accept": media_type})
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+    forecasts = _decode(response)["forecasts"]
+    if media_type == JSON_MEDIA_TYPE:
+        assert forecasts == []
+    else:
+        assert forecasts["count"] == 0
+        assert "start" not in forecasts
+        assert forecasts["temperature"] == forecasts["rainfall"] == []
+
+
+def test_etag_covers_every_point(client):
+    short = client.post("/forecast", json={**FORECAST, "forecast_months": 1}).headers["ETag"]
+    longer = client.post("/forecast", json={**FORECAST, "forecast_months": 2}).headers["ETag"]
+    assert short != longer
+    assert client.post("/forecast", json={**FORECAST, "forecast_months": 1}).headers["ETag"] == short
+
+
+def test_get_matches_post_and_revalidates(client):
+    posted = client.post("/forecast", json={**FORECAST, "forecast_months": 2, "variables": ["rainfall", "windspeed"]})
+    params = {**FORECAST, "forecast_months": 2, "variables": "rainfall, windspeed"}
+    fetched = client.get("/forecast", params=params)
+    assert fetched.status_code == 200
+    assert fetched.json() == posted.json()
+    assert fetched.headers["ETag"] == posted.headers["ETag"]
+
+    revalidated = client.get("/forecast", params=params, headers={"If-None-Match": fetched.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["ETag"] == fetched.headers["ETag"]
+
+
+def test_get_rejects_unknown_variables(client):
+    response = client.get("/forecast", params={**FORECAST, "variables": "humidity"})
+    assert response.status_code == 422
+
+
+def test_extra_variables_align_with_temperature(client):
+    body = {**FORECAST, "forecast_months": 2, "variables": ["rainfall", "windspeed"]}
+    result = client.post("/forecast", json=body).json()
+    points = result["forecasts"]
+    assert len(points) == 60
+    for point in points:
+        assert point["rainfall"] >= 0 and point["windspeed"] >= 0
+
+    # Each variable is fitted on its own; day i of every series must be the same date
+    only_temperature = client.post("/forecast", json={**body, "variables": None}).json()["forecasts"]
+    assert [p["date"] for p in points] == [p["date"] for p in only_temperature]
+    assert [p["temperature"] for p in points] == [p["temperature"] for p in only_temperature]
+    assert all(p["rainfall"] is None and p["windspeed"] is None for p in only_temperature)
+
+    columns = client.post("/forecast", json=body, headers={"Accept": COLUMNAR_JSON_MEDIA_TYPE}).json()["forecasts"]
+    assert columns["start"] == points[0]["date"][:10]
+    for name in ("temperature", "temperature_lower", "temperature_upper", "rainfall", "windspeed"):
+        assert len(columns[name]) == columns["count"] == 60
+    np.testing.assert_allclose(columns["rainfall"], [p["rainfall"] for p in points], atol=0.005)
+
+    streamed = client.post("/forecast", json=body, headers={"Accept": "application/x-ndjson"})
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert lines[0]["forecast_points"] == 60
+    assert lines[1:] == points
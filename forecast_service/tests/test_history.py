@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+
+def _frame(service, temperatures):
+    frame = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=len(temperatures), freq="D")})
+    for column in service.CACHE_COLUMNS:
+        frame[column] = 1.0
+    frame["temperature"] = temperatures
+    return frame
+
+
+def test_short_gaps_are_interpolated_and_long_ones_left_missing(service):
+    fill = service.NASA_FILL_VALUE
+    temperatures = [10.0, fill, fill, 13.0, 14.0] + [fill] * 6 + [21.0, fill]
+    merged = service.merge_history([_frame(service, temperatures)])
+
+    values = merged["temperature"].to_numpy()
+    np.testing.assert_allclose(values[:5], [10.0, 11.0, 12.0, 13.0, 14.0])
+    assert np.isnan(values[5:11]).all()
+    assert values[11] == 21.0
+    assert values[12] == 21.0  # a short run at the edge takes the nearest value
+    assert merged["rainfall"].eq(1.0).all()
+
+
+def test_days_missing_every_variable_are_dropped(service):
+    frame = _frame(service, [10.0, 11.0, 12.0])
+    frame.loc[1, service.CACHE_COLUMNS] = service.NASA_FILL_VALUE
+    merged = service.merge_history([frame])
+    assert merged["date"].dt.day.tolist() == [1, 3]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from model_cache import PickleStore
+from model_state import ModelState, ModelStateStore
+
+ARIMA_FORECAST = {
+    "latitude": 47.0,
+    "longitude": 8.0,
+    "start_date": "20220101",
+    "end_date": "20231231",
+    "forecast_months": 1,
+    "model": "arima",
+}
+
+
+def _history(start, end):
+    dates = pd.date_range(start, end, freq="D")
+    return pd.DataFrame({"date": dates, "temperature": np.random.default_rng(1).normal(15, 3, len(dates))})
+
+
+def _state():
+    result = [{"date": f"2023-01-{day:02d}T00:00:00", "value": 15.0, "lower": 12.0, "upper": 18.0}
+              for day in range(1, 31)]
+    return ModelState("arima", "temperature", pd.Timestamp("2022-01-01"), pd.Timestamp("2022-12-31"),
+                      params=None, result=result, error_scale=3.0)
+
+
+def test_state_only_extends_the_same_history_start():
+    state = _state()
+    assert state.covers(_history("2022-01-01", "2022-12-31"))
+    assert not state.covers(_history("2022-01-01", "2023-01-05"))
+    assert state.refit_reason(_history("2022-01-01", "2023-01-05"), 1e9, 1e9) is None
+    assert state.refit_reason(_history("2022-06-01", "2023-01-05"), 1e9, 1e9) == "history_changed"
+    assert state.refit_reason(_history("2021-01-01", "2023-01-05"), 1e9, 1e9) == "history_changed"
+    assert state.refit_reason(_history("2022-01-01", "2022-11-30"), 1e9, 1e9) == "history_changed"
+
+
+def test_states_persist_through_the_shared_pickle_store(tmp_path):
+    key = (47.0, 8.0, "20220101", "arima", "temperature")
+    ModelStateStore(10, str(tmp_path)).put(key, _state())
+    restored = ModelStateStore(10, str(tmp_path)).get(key)
+    assert restored.result == _state().result
+    assert restored.start == pd.Timestamp("2022-01-01")
+
+    store = PickleStore(str(tmp_path), ".state.pkl", "Model state")
+    assert store.load(key)["key"] == key
+    assert store.load(("another", "key")) is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_unchanged_history_reuses_the_stored_forecast(client, service, monkeypatch):
+    # Entries expire at once, so every request misses the forecast cache
+    monkeypatch.setattr(service.forecast_cache, "ttl", 0)
+    before = service.model_states.stats()
+
+    first = client.post("/forecast", json=ARIMA_FORECAST).json()
+    repeat = client.post("/forecast", json=ARIMA_FORECAST).json()
+    later_start = client.post("/forecast", json={**ARIMA_FORECAST, "start_date": "20220601"}).json()
+
+    after = service.model_states.stats()
+    assert repeat["forecasts"] == first["forecasts"]
+    assert after["reused"] == before["reused"] + 1
+    assert after["full_fits"] == before["full_fits"] + 2
+    assert after["refit_reasons"]["no_state"] == before["refit_reasons"].get("no_state", 0) + 2
+    assert later_start["forecasts"][0]["date"] == first["forecasts"][0]["date"]
@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pandas as pd
+
+from conftest import fake_nasa_power
+from nasa_cache import NASA_FILL_VALUE, NasaPowerCache
+
+UNPUBLISHED_DAYS = 4
+
+
+def _recent_days_unpublished(requests):
+    """fake_nasa_power with the last UNPUBLISHED_DAYS days up to today returned as fill values"""
+    first_unpublished = (datetime.now() - timedelta(days=UNPUBLISHED_DAYS - 1)).strftime("%Y%m%d")
+
+    def handler(request):
+        requests.append((request.url.params["start"], request.url.params["end"]))
+        body = json.loads(fake_nasa_power(request).content)
+        for series in body["properties"]["parameter"].values():
+            for day in series:
+                if day >= first_unpublished:
+                    series[day] = NASA_FILL_VALUE
+        return httpx.Response(200, json=body)
+
+    return handler
+
+
+def test_unpublished_days_are_not_requested_again_within_the_ttl(client, service, monkeypatch):
+    requests = []
+    service.nasa_client._client._transport = httpx.MockTransport(_recent_days_unpublished(requests))
+    body = {"latitude": 63.5, "longitude": -21.25, "snap_to_grid": False}
+
+    assert client.post("/thirty-day-forecast", json=body).status_code == 200
+    assert requests
+    requests.clear()
+    for _ in range(2):
+        assert client.post("/thirty-day-forecast", json=body).status_code == 200
+    assert requests == []
+
+    # Once the note has expired, NASA is asked for those days again
+    monkeypatch.setattr(service.nasa_cache, "unpublished_ttl", 0)
+    assert client.post("/thirty-day-forecast", json=body).status_code == 200
+    first_unpublished = datetime.now() - timedelta(days=UNPUBLISHED_DAYS - 1)
+    assert requests == [(first_unpublished.strftime("%Y%m%d"), datetime.now().strftime("%Y%m%d"))]
+
+
+def test_fill_values_inside_the_history_are_not_noted(tmp_path):
+    cache = NasaPowerCache(str(tmp_path))
+    frame = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=5, freq="D"),
+        "temperature": [1.0, NASA_FILL_VALUE, 3.0, NASA_FILL_VALUE, NASA_FILL_VALUE],
+        "rainfall": 0.0,
+        "windspeed": 1.0,
+    })
+    cache.store(1.0, 2.0, frame)
+    assert cache.unpublished(1.0, 2.0) == (datetime(2024, 1, 4), datetime(2024, 1, 5))
+    gaps = cache.missing_ranges(cache.load(1.0, 2.0, datetime(2024, 1, 1), datetime(2024, 1, 5)),
+                                datetime(2024, 1, 1), datetime(2024, 1, 5), cache.unpublished(1.0, 2.0))
+    assert gaps == [(datetime(2024, 1, 2), datetime(2024, 1, 2))]
@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+
+# Values on and just either side of every threshold in predict_rainfall
+TEMPERATURES = [-5.0, 9.99, 10.0, 10.01, 14.99, 15.0, 15.01, 20.0, 24.99, 25.0, 25.01, 29.99, 30.0, 30.01, 40.0]
+HUMIDITIES = [0.0, 29.99, 30.0, 30.01, 40.0, 49.99, 50.0, 50.01, 69.99, 70.0, 70.01, 79.99, 80.0, 80.01, 100.0]
+PRESSURES = [960.0, 982.99, 983.0, 993.0, 992.99, 993.01, 1012.99, 1013.0, 1013.01, 1032.99, 1033.0, 1033.01, 1060.0]
+
+
+def _assert_batch_matches_scalar(service, temperature, humidity, pressure):
+    batch = service.predict_rainfall_batch(np.array(temperature), np.array(humidity), np.array(pressure))
+    probability = service._round_array(batch["rainfall_probability"], 3)
+    rainfall_mm = service._round_array(batch["predicted_rainfall_mm"], 2)
+    confidence = service._round_array(batch["confidence"], 3)
+    risk = batch["risk_level"].tolist()
+    for i, inputs in enumerate(zip(temperature, humidity, pressure)):
+        assert service.predict_rainfall(*inputs) == {
+            "rainfall_probability": probability[i],
+            "risk_level": risk[i],
+            "predicted_rainfall_mm": rainfall_mm[i],
+            "confidence": confidence[i],
+        }, inputs
+
+
+def test_batch_matches_scalar_at_band_edges(service):
+    grid = list(itertools.product(TEMPERATURES, HUMIDITIES, PRESSURES))
+    _assert_batch_matches_scalar(service, *map(list, zip(*grid)))
+
+
+def test_batch_matches_scalar_on_random_inputs(service):
+    rng = np.random.default_rng(0)
+    n = 20000
+    _assert_batch_matches_scalar(
+        service,
+        rng.uniform(-20, 50, n).tolist(),
+        rng.uniform(0, 100, n).tolist(),
+        rng.uniform(950, 1070, n).tolist(),
+    )
+
+
+def test_batch_endpoint_matches_single_endpoint(client):
+    scenarios = [[15.0, 80.0, 993.0], [30.0, 50.0, 1013.0], [9.99, 70.0, 1033.01], [25.0, 30.0, 1012.99]]
+    response = client.post("/predict-rainfall/batch", json={"scenarios": scenarios})
+    assert response.status_code == 200
+    batch = response.json()
+    assert batch["count"] == len(scenarios)
+    for i, (temperature, humidity, pressure) in enumerate(scenarios):
+        single = client.post("/predict-rainfall", json={
+            "temperature": temperature, "humidity": humidity, "pressure": pressure
+        }).json()
+        assert single == {field: batch[field][i] for field in single}
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+def test_more_cells_than_the_fit_pool_holds(client, service):
+    # Every cell needs its own fit; together they exceed the pool's workers plus queue
+    cells = service.fit_pool.capacity + 3
+    body = {
+        "locations": [{"latitude": -30.0 + 5 * i, "longitude": 10.0 + 7 * i} for i in range(cells)],
+        "dates": ["2030-06-01", "2030-06-02"],
+        "model": "arima",
+        "top_k": 3,
+    }
+    response = client.post("/rank-event-dates", json=body)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["errors"] == []
+    assert result["evaluated"] == cells * 2
+    assert len(result["options"]) == 3
+
+
+def test_ties_are_broken_by_request_order(client):
+    # "b" and "d" share a cell, so they are scored together and tie on every date;
+    # between them the earlier request position must win, whatever top_k cuts at
+    locations = [
+        {"latitude": 10.0, "longitude": 10.0, "name": "a"},
+        {"latitude": -20.0, "longitude": 30.0, "name": "b"},
+        {"latitude": 40.0, "longitude": -50.0, "name": "c"},
+        {"latitude": -20.0, "longitude": 30.0, "name": "d"},
+    ]
+    body = {"locations": locations, "dates": ["2031-01-10", "2031-01-11", "2031-01-12"],
+            "model": "climatology", "top_k": 12}
+    options = client.post("/rank-event-dates", json=body).json()["options"]
+
+    names = [o["name"] for o in options if o["name"] in ("b", "d")]
+    assert names == ["b", "d"] * 3
+    for k in range(1, 12):
+        partial = client.post("/rank-event-dates", json={**body, "top_k": k}).json()["options"]
+        assert partial == options[:k]
+
+
+def test_rainfall_probability_is_the_model_probability(service):
+    temperature = np.array([[12.0, 22.0, 31.0]])
+    reference = np.array([[18.0]])
+    rain_days = np.array([[0.0, 0.5, 1.0]])
+    _, penalties, probability = service.score_event_conditions(
+        temperature, np.full(temperature.shape, 3.0), rain_days, reference, service.EVENT_PENALTY_WEIGHTS
+    )
+    humidity = np.clip(70 - (temperature - reference) * 1.5, 30, 95)
+    expected = service.predict_rainfall_batch(temperature, humidity, np.full(temperature.shape, 1013.0))
+    np.testing.assert_array_equal(probability, expected["rainfall_probability"])
+    np.testing.assert_allclose(penalties["rain"], 0.5 * probability + 0.5 * rain_days)
+
+
+def test_too_many_cells_are_rejected_before_fetching(client, service, monkeypatch):
+    fetched = []
+
+    async def fetch(*args):
+        fetched.append(args)
+        raise AssertionError("nothing should be fetched")
+
+    monkeypatch.setattr(service, "fetch_nasa_power_data", fetch)
+    locations = [{"latitude": -60.0 + i, "longitude": 0.0} for i in range(service.MAX_RANKING_CELLS + 1)]
+    response = client.post("/rank-event-dates", json={"locations": locations, "dates": ["2030-06-01"]})
+    assert response.status_code == 422
+    assert fetched == []
+
+
+def test_candidates_sharing_a_cell_count_once(client, service):
+    same_cell = [{"latitude": 10.0, "longitude": 10.0 + i * 0.01} for i in range(service.MAX_RANKING_CELLS + 1)]
+    body = {"locations": same_cell, "dates": ["2030-06-01"], "model": "climatology"}
+    assert client.post("/rank-event-dates", json=body).status_code == 200
+
+
+def test_fetches_are_bounded_per_request(client, service, monkeypatch):
+    fetch = service.fetch_nasa_power_data
+    running = []
+    peak = []
+
+    async def counting_fetch(*args):
+        running.append(args)
+        peak.append(len(running))
+        try:
+            return await fetch(*args)
+        finally:
+            running.remove(args)
+
+    monkeypatch.setattr(service, "fetch_nasa_power_data", counting_fetch)
+    cells = service.RANKING_FETCH_CONCURRENCY * 3
+    body = {
+        "locations": [{"latitude": -50.0 + 4 * i, "longitude": 100.0 + 3 * i} for i in range(cells)],
+        "dates": ["2030-06-01"],
+        "model": "climatology",
+    }
+    response = client.post("/rank-event-dates", json=body)
+    assert response.status_code == 200
+    assert response.json()["errors"] == []
+    assert len(peak) == cells
+    assert max(peak) <= service.RANKING_FETCH_CONCURRENCY
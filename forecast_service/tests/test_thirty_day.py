@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+
+def _baseline(service):
+    history = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=90, freq="D"),
+        "temperature": np.random.default_rng(0).normal(20, 3, 90),
+        "rainfall": 1.0,
+        "windspeed": 3.0,
+    })
+    return service.history_baseline(history, pd.Timestamp("2024-03-31").to_pydatetime())
+
+
+def test_seeded_ensemble_is_deterministic(service):
+    baseline = _baseline(service)
+    first, first_median = service.build_ensemble(baseline, np.random.default_rng(42), 500)
+    second, second_median = service.build_ensemble(baseline, np.random.default_rng(42), 500)
+    assert first.model_dump() == second.model_dump()
+    for name in first_median:
+        np.testing.assert_array_equal(first_median[name], second_median[name])
+
+    other, _ = service.build_ensemble(baseline, np.random.default_rng(43), 500)
+    assert other.model_dump() != first.model_dump()
+
+
+def test_seeded_requests_are_reproducible(client):
+    body = {"latitude": -33.9, "longitude": 18.4, "ensemble_members": 200, "seed": 7}
+    first = client.post("/thirty-day-forecast", json=body)
+    second = client.post("/thirty-day-forecast", json=body)
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert first.json()["ensemble"]["seed"] == 7
+
+    single = {"latitude": -33.9, "longitude": 18.4, "seed": 7}
+    assert client.post("/thirty-day-forecast", json=single).json() == \
+        client.post("/thirty-day-forecast", json=single).json()
+
+
+def test_unseeded_ensemble_reports_a_replayable_seed(client):
+    body = {"latitude": -33.9, "longitude": 18.4, "ensemble_members": 50}
+    first = client.post("/thirty-day-forecast", json=body).json()
+    replay = client.post("/thirty-day-forecast", json={**body, "seed": first["ensemble"]["seed"]}).json()
+    assert replay == first
+
+
+def test_invalid_ensemble_parameters_are_rejected(client):
+    base = {"latitude": -33.9, "longitude": 18.4}
+    assert client.post("/thirty-day-forecast", json={**base, "seed": -1}).status_code == 422
+    assert client.post("/thirty-day-forecast", json={**base, "ensemble_members": 0}).status_code == 422